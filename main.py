@@ -1,21 +1,23 @@
+import os
+import sys
 from src.data import DataGrid
+from src.gridfile import SUFFIX, open_grid
+from src.trace import trace_search
+from src.worker import SearchWorker
+from src.instrument import Instrumentation
 from src.interface import Interface
-from src.algorithms.astar import AStar
-from src.algorithms.dijkstra import Dijkstra
-from src.algorithms.greedyBFS import GreedyBFS
-from src.algorithms.breadthFirstSearch import BreadthFirstSearch
-from src.algorithms.depthFirstSearch import DepthFirstSearch
+from src.algorithms.registry import algorithms
 import pygame.time
 
 
 if __name__ == '__main__':
-    # Add additional algorithms to this list:
-    algorithms = [Dijkstra, AStar, GreedyBFS, BreadthFirstSearch, DepthFirstSearch]
-
-    # Set up the data container
-    data = DataGrid()
-    # Start the user interface
-    frontend = Interface(data)
+    # Set up the data container, from a grid file or MovingAI map if one is given
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    data = open_grid(path) if path else DataGrid()
+    # Start the user interface, imported maps are saved as grid files next to them
+    frontend = Interface(data, os.path.splitext(path)[0] + SUFFIX if path else "saved" + SUFFIX)
+    # Last algorithm that ran, incremental ones continue their search after the map changed
+    algo = None
 
     while not frontend.app_quit:
         # Let the user draw a labyrinth
@@ -23,26 +25,53 @@ if __name__ == '__main__':
 
         # Space bar was pressed?
         if frontend.app_find_path:
+            # No search can reach a goal outside the component of the start
+            if not data.is_reachable(data.start_pos, data.goal_pos):
+                print("No path found")
+                frontend.app_find_path = False
+                continue
+
             # Choose the algorithm from algorithms list
             Algorithm = frontend.choose_algorithm(algorithms)
+            if Algorithm is None:
+                # Choice aborted
+                frontend.app_find_path = False
+                continue
 
             # Dynamically create the algorithm object and set up any requirements
-            algo = Algorithm(data)
+            if type(algo) is not Algorithm or not algo.replan(data):
+                algo = Algorithm(data)
             # algo.setup(data)
+            # A new probe for every search, or none at all
+            algo.probe = Instrumentation() if frontend.instrument_mode else None
+
+            if frontend.trace_mode:
+                # Search at full speed, then replay the recorded cell changes
+                frontend.replay(data, trace_search(data, algo))
+            elif frontend.background_mode:
+                # Search at full speed on a worker, the window shows snapshots of its progress
+                worker = SearchWorker(data, algo)
+                worker.start()
+                frontend.watch(data, worker)
 
             clock = pygame.time.Clock()
-            while not algo.is_done() and not frontend.app_quit:
-                algo.run_algorithm(data)
+            while not algo.is_done() and not frontend.app_quit and not frontend.app_cancel:
+                algo.step(data)
                 frontend.handle(data)
                 clock.tick(240)
 
             if algo.is_done():
+                print("Path found" if algo.found else "No path found")
                 # Display the result
                 frontend.handle(data)
+            elif frontend.app_cancel:
+                print("Search cancelled")
+            if algo.probe is not None:
+                print(algo.probe.to_json())
 
             frontend.app_find_path = False
+            frontend.app_cancel = False
             frontend.reset_view(data)
-            del algo
             del Algorithm
 
 
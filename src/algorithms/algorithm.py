@@ -1,6 +1,9 @@
 from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
 from src.data import DataGrid
-from src.data import Cell
+from src.data import Cell, CellValue
+from src.graph import distance
+from src.instrument import Instrumentation
 
 
 class Algorithm(ABC):
@@ -10,26 +13,95 @@ class Algorithm(ABC):
     name: str
     # Current state of the algorithm
     done: bool = False
+    # True if the algorithm reached the goal
+    found: bool = False
+    # Number of cells expanded so far
+    expanded: int = 0
+    # True if the path found is always a best one (the cheapest, or the shortest if the search ignores costs), so
+    # walls added away from it can't make another path the result
+    optimal: bool = False
 
+    # Grid the algorithm searches
+    grid: DataGrid
     # Start and goal cells
     start: Cell
     goal: Cell
 
-    def __init__(self, grid: DataGrid):
-        # Get the start and goal cells from the grid
-        sx, sy = grid.start_pos
-        gx, gy = grid.goal_pos
+    # Connectivity of the grid the algorithm runs on (4 or 8)
+    connectivity: int = 4
+
+    # Collects the statistics of the search if the algorithm is instrumented
+    probe: Optional[Instrumentation] = None
+
+    def __init__(self, grid: DataGrid, start: Optional[Tuple[int, int]] = None,
+                 goal: Optional[Tuple[int, int]] = None):
+        self.grid = grid
+        # Get the start and goal cells from the grid unless they are given explicitly
+        sx, sy = grid.start_pos if start is None else start
+        gx, gy = grid.goal_pos if goal is None else goal
         self.start = grid.cells[sx][sy]
         self.goal = grid.cells[gx][gy]
+        self.connectivity = grid.connectivity
 
     @abstractmethod
     def run_algorithm(self, grid: DataGrid):
         pass
 
+    def step(self, grid: DataGrid):
+        """Run one step of the algorithm, timed by the probe if it is instrumented"""
+        if self.probe is None:
+            return self.run_algorithm(grid)
+        return self.probe.step(self, grid)
+
+    def instrument(self, probe: Optional[Instrumentation] = None) -> Instrumentation:
+        """Report the search to probe (a new one by default) from now on and return it"""
+        self.probe = Instrumentation() if probe is None else probe
+        return self.probe
+
     @abstractmethod
-    def show_path(self, grid):
+    def get_path(self) -> List[Cell]:
+        """Return the cells of the path found, from start to goal"""
         pass
 
+    def has_path(self) -> bool:
+        """Return True once a path from start to goal is known, even if the search goes on to make sure it's the best
+
+        The benchmark times the first path with it. By default the path is only known once the search found it.
+        """
+        return self.found
+
+    def replan(self, grid: DataGrid) -> bool:
+        """Prepare to continue the search after walls or costs of grid changed
+
+        Returns False if the algorithm can't reuse its search and has to be created again.
+        """
+        return False
+
+    def trace_path(self, came_from: Dict[Tuple[int, int], Tuple[int, int]], end: Optional[Cell] = None) -> List[Cell]:
+        """Follow the parent position of every position in came_from back from end (the goal by default) and return
+        the cells of the path from the root of came_from to end
+
+        Parents are kept as positions rather than cells, so a search doesn't keep a cell view alive for every
+        cell it reached on compact grids.
+        """
+        current = (self.goal if end is None else end).pos
+        path = [current]
+        while current in came_from:
+            current = came_from[current]
+            path.append(current)
+        path.reverse()
+        return [self.grid.cells[x][y] for x, y in path]
+
+    def distance(self, n1: Cell, n2: Cell) -> float:
+        """Return the Manhattan (4-connected) or octile (8-connected) distance of two cells"""
+        return distance(n1.pos, n2.pos, self.connectivity)
+
+    def show_path(self, grid: DataGrid):
+        """Mark the cells of the path found"""
+        for cell in self.get_path():
+            if cell.pos != self.start.pos and cell.pos != self.goal.pos:
+                cell.value = CellValue.PATH
+
     def is_done(self):
         """Return true if the algorithm is done"""
         return self.done
@@ -1,52 +1,54 @@
 from src.algorithms.algorithm import Algorithm
 from src.data import DataGrid
+from src.workspace import Workspace
 from src.cell import Cell, CellValue
-from queue import PriorityQueue
+from src.graph import SQRT2
+from heapq import heappush, heappop
 from math import inf
-from typing import List, Dict, Tuple
+from typing import List, Dict, Set, Tuple, Optional
 
 
 class AStar(Algorithm):
     name: str = "A*"
-    open_set: PriorityQueue
-    open_set_iterable: List[Cell]
+    optimal: bool = True
+    open_set: List[Tuple[float, int, Cell]]
+    open_positions: Set[Tuple[int, int]]
 
-    came_from: Dict[Tuple[int, int], Cell]
+    came_from: Dict[Tuple[int, int], Tuple[int, int]]
 
-    g_score: Dict[Tuple[int, int], float]
-    f_score: Dict[Tuple[int, int], float]
+    # G scores live in the scores of the workspace, entries of other generations are infinite
+    workspace: Workspace
+    generation: int
 
     count: int = 0
+    # Lowest cost of entering a cell, scales the heuristic
+    min_cost: float = 1.0
 
-    def __init__(self, grid: DataGrid):
+    def __init__(self, grid: DataGrid, start: Optional[Tuple[int, int]] = None,
+                 goal: Optional[Tuple[int, int]] = None):
         """Set up the A* algorithm"""
-        super().__init__(grid)
-
-        # Build the graph
-        self.find_neighbors(grid)
+        super().__init__(grid, start, goal)
+        self.min_cost = grid.min_cost
 
         # G scores state the cost of the path from start to a node on the graph.
-        # Start with infinite cost to all nodes since none are explored yet...
-        self.g_score = {cell.pos: inf for row in grid.cells for cell in row}
+        # All nodes start with infinite cost since none are explored yet, which the workspace provides for free...
+        self.workspace = grid.claim_workspace(self)
+        self.generation = self.workspace.generation
         # ...except for the start node:
-        self.g_score[self.start.pos] = 0
-
-        # F scores state how attractive a path from a node to its neighbor is.
-        # f(n) = g(n) + h(n)
-        # Initialize to inf as none have been evaluated yet...
-        self.f_score = {cell.pos: inf for row in grid.cells for cell in row}
-        # ...except for the start node:
-        self.f_score[self.start.pos] = self.g_score[self.start.pos] + self.h(self.start, self.goal)
+        self.set_g_score(self.start.pos, 0)
 
         # Create the heap queue
-        self.open_set = PriorityQueue()
+        self.open_set = []
         # Count is a tie-breaker in case cells put to the queue have equal cost
-        # self.count = 0
         # Data is inserted into the queue as a tuple: (f_score, count, cell)
-        self.open_set.put((self.f_score[self.start.pos], self.count, self.start))
-        # Create a helper list that stores the same cells as the heap queue
-        # This is required because we can't loop over the elements of a heap queue
-        self.open_set_iterable = [self.start]
+        # F scores state how attractive a path from a node to its neighbor is.
+        # f(n) = g(n) + h(n)
+        heappush(self.open_set, (self.h(self.start, self.goal), self.count, self.start))
+        # Create a helper set of the positions in the heap queue
+        # This is required because we can't check the membership of a heap queue efficiently.
+        # A cell that is pushed again with a lower f score stays in the heap with its old score as well,
+        # these outdated entries are skipped when they are popped (lazy deletion).
+        self.open_positions = {self.start.pos}
 
         # Dict of the path
         self.came_from = {}
@@ -59,83 +61,92 @@ class AStar(Algorithm):
         https://en.wikipedia.org/wiki/A*_search_algorithm#Pseudocode
         """
 
-        # Get the node with lowest f score from the heap queue and update the helper list accordingly
-        current = self.open_set.get()[2]
-        self.open_set_iterable.remove(current)
+        probe = self.probe
+
+        # Get the node with lowest f score from the heap queue and update the helper set accordingly
+        current = heappop(self.open_set)[2]
+        while current.pos not in self.open_positions:
+            # Outdated entry of a cell that was already popped with a lower f score
+            if probe is not None:
+                probe.pop(current.pos, stale=True)
+            current = heappop(self.open_set)[2]
+        self.open_positions.remove(current.pos)
 
         # Mark the current cell as considered, so we can show it in the frontend
         current.set_value(CellValue.CONSIDERED)
 
+        self.expanded += 1
+        if probe is not None:
+            probe.pop(current.pos)
+            probe.expand(current.pos)
+
         # Check if we are done
-        if current == self.goal:
-            print("Path found")
+        if current.pos == self.goal.pos:
             self.done = True
+            self.found = True
             # Mark the cells of the successful path
             self.show_path(grid)
             return True
 
+        # The weight of an edge is the cost of entering the neighbor, times SQRT2 for diagonal steps
+        costs = grid.costs
+        workspace, generation = self.workspace, self.generation
+        stamps, scores, rows = workspace.stamps, workspace.scores, workspace.rows
+        current_g_score = scores[current.x * rows + current.y]
         for neighbor in current.neighbors:
+            weight = costs.item(neighbor.pos)
+            if neighbor.x != current.x and neighbor.y != current.y:
+                weight *= SQRT2
             # Calculate G score of the neighbor when coming from the current node
-            tentative_g_score = self.g_score[current.pos] + self.d(current, neighbor)
+            tentative_g_score = current_g_score + weight
 
             # If G score to neighbor (when coming from current node) is smaller than the currently stored G score:
-            if tentative_g_score < self.g_score[neighbor.pos]:
+            index = neighbor.x * rows + neighbor.y
+            if stamps[index] != generation or tentative_g_score < scores[index]:
                 # Update the path and scores
-                self.came_from[neighbor.pos] = current
-                self.g_score[neighbor.pos] = tentative_g_score
-                self.f_score[neighbor.pos] = tentative_g_score + self.h(neighbor, self.goal)
-                # If the neighbor isn't currently in the helper list, it's also not in the heap queue
-                if neighbor not in self.open_set_iterable:
-                    # So we add it to consider it in a future iteration
-                    self.count += 1
-                    self.open_set.put((self.f_score[neighbor.pos], self.count, neighbor))
-                    self.open_set_iterable.append(neighbor)
-                    # And mark it's current state for the frontend
+                self.came_from[neighbor.pos] = current.pos
+                stamps[index] = generation
+                scores[index] = tentative_g_score
+                # Push the neighbor with its new f score, any older entry of it becomes outdated
+                self.count += 1
+                heappush(self.open_set, (tentative_g_score + self.h(neighbor, self.goal), self.count, neighbor))
+                if probe is not None:
+                    probe.push(neighbor.pos, len(self.open_set), duplicate=neighbor.pos in self.open_positions)
+                # If the neighbor isn't currently in the helper set, it's new to the heap queue
+                if neighbor.pos not in self.open_positions:
+                    self.open_positions.add(neighbor.pos)
+                    # So mark it's current state for the frontend
                     neighbor.set_value(CellValue.CONSIDERING)
 
         # If there aren't any more nodes on the heap queue, we were unsuccessful in finding a path
-        if self.open_set.empty():
+        if not self.open_positions:
             self.done = True
-            print("No path found")
             return False
 
-    @staticmethod
-    def d(current, neighbor):
-        """Return the weight of the edge from current to neighbor
+    def g_score(self, pos: Tuple[int, int]) -> float:
+        """Return the cost of the cheapest path from the start to pos found so far, inf if pos wasn't reached"""
+        index = pos[0] * self.workspace.rows + pos[1]
+        if self.workspace.stamps[index] != self.generation:
+            return inf
+        return self.workspace.scores[index]
+
+    def set_g_score(self, pos: Tuple[int, int], score: float) -> None:
+        """Store the cost of the cheapest path from the start to pos found so far"""
+        index = pos[0] * self.workspace.rows + pos[1]
+        self.workspace.stamps[index] = self.generation
+        self.workspace.scores[index] = score
 
-        --- Not implemented at this point ---
+    def h(self, n1, n2):
+        """Return the Manhattan (4-connected) or octile (8-connected) distance of two nodes times the lowest cell cost
+
+        Every step costs at least min_cost times its length, so the estimate never exceeds the cost of the path.
         """
-        return 1
-
-    @staticmethod
-    def h(n1, n2):
-        """Return the Manhattan distance of two nodes"""
-        return abs(n1.x - n2.x) + abs(n1.y - n2.y)
-
-    def show_path(self, grid):
-        """Mark the discovered cells as path"""
-        current = self.goal
-        while current.pos in self.came_from:
-            current = self.came_from[current.pos]
-            if current is not self.start:
-                current.value = CellValue.PATH
-
-    @staticmethod
-    def find_neighbors(grid: DataGrid):
-        """Identifies the non-blocked neighbors of every cell in the grid"""
-        for col in grid.cells:
-            for cell in col:
-                # Check if the neighbor exists and is open
-                cell.neighbors = []
-                # Left
-                if cell.x > grid.x_min and not grid.cells[cell.x - 1][cell.y].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x - 1][cell.y])
-                # Right
-                if cell.x < grid.x_max and not grid.cells[cell.x + 1][cell.y].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x + 1][cell.y])
-                # Up
-                if cell.y > grid.y_min and not grid.cells[cell.x][cell.y - 1].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x][cell.y - 1])
-                # Down
-                if cell.y < grid.y_max and not grid.cells[cell.x][cell.y + 1].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x][cell.y + 1])
\ No newline at end of file
+        return self.min_cost * self.distance(n1, n2)
+
+    def has_path(self) -> bool:
+        """Return True once the goal was reached from a discovered cell"""
+        return self.found or self.goal.pos in self.came_from
+
+    def get_path(self) -> List[Cell]:
+        """Follow the discovered cells back from the goal"""
+        return self.trace_path(self.came_from)
\ No newline at end of file
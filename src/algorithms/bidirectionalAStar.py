@@ -0,0 +1,151 @@
+from src.algorithms.algorithm import Algorithm
+from src.data import DataGrid
+from src.cell import Cell, CellValue
+from src.graph import SQRT2
+from heapq import heappush, heappop
+from math import inf
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class BidirectionalAStar(Algorithm):
+    """A* from start towards the goal and from goal towards the start at the same time
+
+    Every step expands a cell of the smaller of the two open sets, of the cells with the lowest f score the one
+    farthest from its root, so both searches head straight for each other and meet in the middle. The search stops
+    once the best path found is no longer than any path through the open sets can be: such a path costs at least
+    the lowest f score of either search, and at least the lowest g scores of both open sets plus the cheapest step
+    between them.
+    """
+    name: str = "Bidirectional A*"
+    optimal: bool = True
+
+    # Index 0 holds the search from the start, index 1 the search from the goal
+    # Heap queues of (f_score, -g_score, count, cell)
+    open_sets: Tuple[List[Tuple[float, float, int, Cell]], List[Tuple[float, float, int, Cell]]]
+    open_positions: Tuple[Set[Tuple[int, int]], Set[Tuple[int, int]]]
+    # Heap queues of (g_score, count, position) of the open cells, entries with another g score are outdated
+    g_queues: Tuple[List[Tuple[float, int, Tuple[int, int]]], List[Tuple[float, int, Tuple[int, int]]]]
+    g_score: Tuple[Dict[Tuple[int, int], float], Dict[Tuple[int, int], float]]
+    came_from: Tuple[Dict[Tuple[int, int], Tuple[int, int]], Dict[Tuple[int, int], Tuple[int, int]]]
+
+    # Cost of the shortest path found so far and the edge where the two searches meet on it
+    best: float
+    meeting: Optional[Tuple[Cell, Cell]]
+
+    count: int = 0
+    # Lowest cost of entering a cell, scales the heuristic
+    min_cost: float = 1.0
+
+    def __init__(self, grid: DataGrid, start: Optional[Tuple[int, int]] = None,
+                 goal: Optional[Tuple[int, int]] = None):
+        """Set up the Bidirectional A* algorithm"""
+        super().__init__(grid, start, goal)
+        self.min_cost = grid.min_cost
+        # Each search is guided towards the root of the other one
+        self.targets = (self.goal, self.start)
+        self.g_score = ({self.start.pos: 0}, {self.goal.pos: 0})
+        self.came_from = ({}, {})
+        self.open_sets = ([(self.h(self.start, self.goal), 0, 0, self.start)],
+                          [(self.h(self.goal, self.start), 0, 0, self.goal)])
+        self.open_positions = ({self.start.pos}, {self.goal.pos})
+        self.g_queues = ([(0, 0, self.start.pos)], [(0, 0, self.goal.pos)])
+
+        self.best = 0 if self.start.pos == self.goal.pos else inf
+        self.meeting = (self.start, self.goal) if self.start.pos == self.goal.pos else None
+
+    def run_algorithm(self, grid: DataGrid):
+        """
+        Bidirectional A* algorithm to find a path from start to goal
+
+        Reference:
+        https://en.wikipedia.org/wiki/Bidirectional_search
+        """
+        side = 0 if len(self.open_positions[0]) <= len(self.open_positions[1]) else 1
+        open_set, open_positions = self.open_sets[side], self.open_positions[side]
+        g_score, other_g_score = self.g_score[side], self.g_score[1 - side]
+        target = self.targets[side]
+
+        probe = self.probe
+        current = heappop(open_set)[3]
+        while current.pos not in open_positions:
+            # Outdated entry of a cell that was already popped with a lower f score
+            if probe is not None:
+                probe.pop(current.pos, stale=True)
+            current = heappop(open_set)[3]
+        open_positions.remove(current.pos)
+
+        current.set_value(CellValue.CONSIDERED)
+        self.expanded += 1
+        if probe is not None:
+            probe.pop(current.pos)
+            probe.expand(current.pos)
+
+        # Edges cost as much as entering the cell they lead to on the way from start to goal (times SQRT2 for
+        # diagonal steps), which is the neighbor in the search from the start and the current cell in the search
+        # from the goal
+        costs = grid.costs
+        current_cost = costs.item(current.pos)
+        for neighbor in current.neighbors:
+            weight = costs.item(neighbor.pos) if side == 0 else current_cost
+            if neighbor.x != current.x and neighbor.y != current.y:
+                weight *= SQRT2
+            tentative_g_score = g_score[current.pos] + weight
+            if tentative_g_score < g_score.get(neighbor.pos, inf):
+                self.came_from[side][neighbor.pos] = current.pos
+                g_score[neighbor.pos] = tentative_g_score
+                self.count += 1
+                heappush(open_set, (tentative_g_score + self.h(neighbor, target), -tentative_g_score, self.count,
+                                    neighbor))
+                heappush(self.g_queues[side], (tentative_g_score, self.count, neighbor.pos))
+                if probe is not None:
+                    probe.push(neighbor.pos, len(self.open_sets[0]) + len(self.open_sets[1]),
+                               duplicate=neighbor.pos in open_positions)
+                if neighbor.pos not in open_positions:
+                    open_positions.add(neighbor.pos)
+                    neighbor.set_value(CellValue.CONSIDERING)
+            if neighbor.pos in other_g_score:
+                # The edge from current to neighbor connects both searches
+                cost = g_score[current.pos] + weight + other_g_score[neighbor.pos]
+                if cost < self.best:
+                    self.best = cost
+                    self.meeting = (current, neighbor) if side == 0 else (neighbor, current)
+
+        if not self.open_positions[0] or not self.open_positions[1] or self.best <= self.lower_bound():
+            self.done = True
+            if self.meeting is not None:
+                self.found = True
+                self.show_path(grid)
+            return True
+
+    def lower_bound(self) -> float:
+        """Return the lowest cost of a path through the open sets of both searches"""
+        f_bound = 0
+        g_bound = self.min_cost
+        for side in (0, 1):
+            open_set, g_queue = self.open_sets[side], self.g_queues[side]
+            open_positions, g_score = self.open_positions[side], self.g_score[side]
+            # Drop outdated entries so the tops of the heaps hold the lowest current f and g scores
+            while open_set[0][3].pos not in open_positions:
+                heappop(open_set)
+            while g_queue[0][2] not in open_positions or g_score[g_queue[0][2]] != g_queue[0][0]:
+                heappop(g_queue)
+            f_bound = max(f_bound, open_set[0][0])
+            g_bound += g_queue[0][0]
+        return max(f_bound, g_bound)
+
+    def h(self, n1, n2):
+        """Return the Manhattan or octile distance of two nodes times the lowest cell cost"""
+        return self.min_cost * self.distance(n1, n2)
+
+    def has_path(self) -> bool:
+        """Return True once the two searches met"""
+        return self.meeting is not None
+
+    def get_path(self) -> List[Cell]:
+        """Join the paths from the start and from the goal at the meeting edge"""
+        forward_end, backward_end = self.meeting
+        path = self.trace_path(self.came_from[0], forward_end)
+        backward = self.trace_path(self.came_from[1], backward_end)
+        if backward[-1].pos == path[-1].pos:
+            backward.pop()
+        return path + backward[::-1]
\ No newline at end of file
@@ -0,0 +1,97 @@
+from src.algorithms.algorithm import Algorithm
+from src.data import DataGrid
+from src.cell import Cell, CellValue
+from collections import deque
+from math import inf
+from typing import Deque, Dict, List, Optional, Tuple
+
+
+class BidirectionalBFS(Algorithm):
+    """Breadth First Search from start and goal at the same time
+
+    Every step expands a cell of the smaller of the two queues. An edge between the cells explored from both sides
+    closes a path. The search stops once no path through the unexpanded cells can be shorter than the best one.
+    """
+    name: str = "Bidirectional BFS"
+    optimal: bool = True
+
+    # Index 0 holds the search from the start, index 1 the search from the goal
+    queues: Tuple[Deque[Cell], Deque[Cell]]
+    dist: Tuple[Dict[Tuple[int, int], int], Dict[Tuple[int, int], int]]
+    came_from: Tuple[Dict[Tuple[int, int], Tuple[int, int]], Dict[Tuple[int, int], Tuple[int, int]]]
+
+    # Length of the shortest path found so far and the edge where the two searches meet on it
+    best: float
+    meeting: Optional[Tuple[Cell, Cell]]
+
+    def __init__(self, grid: DataGrid, start: Optional[Tuple[int, int]] = None,
+                 goal: Optional[Tuple[int, int]] = None):
+        """Set up the Bidirectional Breadth First Search algorithm"""
+        super().__init__(grid, start, goal)
+        self.queues = (deque([self.start]), deque([self.goal]))
+        self.dist = ({self.start.pos: 0}, {self.goal.pos: 0})
+        self.came_from = ({}, {})
+
+        self.best = 0 if self.start.pos == self.goal.pos else inf
+        self.meeting = (self.start, self.goal) if self.start.pos == self.goal.pos else None
+
+        self.done = False
+
+    def run_algorithm(self, grid: DataGrid) -> bool:
+        """
+        Bidirectional Breadth First Search to find a path from start to goal
+
+        Reference:
+        https://en.wikipedia.org/wiki/Bidirectional_search
+        """
+        side = 0 if len(self.queues[0]) <= len(self.queues[1]) else 1
+        dist, other_dist = self.dist[side], self.dist[1 - side]
+
+        probe = self.probe
+        current = self.queues[side].popleft()
+        current.set_value(CellValue.CONSIDERED)
+        self.expanded += 1
+        if probe is not None:
+            probe.pop(current.pos)
+            probe.expand(current.pos)
+        for neighbor in current.neighbors:
+            if neighbor.pos not in dist:
+                dist[neighbor.pos] = dist[current.pos] + 1
+                self.came_from[side][neighbor.pos] = current.pos
+                self.queues[side].append(neighbor)
+                neighbor.set_value(CellValue.CONSIDERING)
+                if probe is not None:
+                    probe.push(neighbor.pos, len(self.queues[0]) + len(self.queues[1]))
+            if neighbor.pos in other_dist:
+                # The edge from current to neighbor connects both searches
+                length = dist[current.pos] + 1 + other_dist[neighbor.pos]
+                if length < self.best:
+                    self.best = length
+                    self.meeting = (current, neighbor) if side == 0 else (neighbor, current)
+
+        if not self.queues[0] or not self.queues[1] or self.best <= self.lower_bound():
+            self.done = True
+            if self.meeting is not None:
+                self.found = True
+                self.show_path(grid)
+            return True
+
+        return False
+
+    def lower_bound(self) -> int:
+        """Return the minimum length of a path that passes through the unexpanded cells of both queues"""
+        forward, backward = self.queues
+        return self.dist[0][forward[0].pos] + self.dist[1][backward[0].pos] + 1
+
+    def has_path(self) -> bool:
+        """Return True once the two searches met"""
+        return self.meeting is not None
+
+    def get_path(self) -> List[Cell]:
+        """Join the paths from the start and from the goal at the meeting edge"""
+        forward_end, backward_end = self.meeting
+        path = self.trace_path(self.came_from[0], forward_end)
+        backward = self.trace_path(self.came_from[1], backward_end)
+        if backward[-1].pos == path[-1].pos:
+            backward.pop()
+        return path + backward[::-1]
\ No newline at end of file
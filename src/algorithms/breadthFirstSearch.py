@@ -1,23 +1,26 @@
 from src.algorithms.algorithm import Algorithm
 from src.data import DataGrid
 from src.cell import Cell, CellValue
-from queue import Queue
-from typing import List
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
 
 
 class BreadthFirstSearch(Algorithm):
     name: str = "Breadth First Search"
-    queue: Queue
+    optimal: bool = True
+    queue: Deque[Cell]
 
-    explored: List[Cell]
+    explored: Set[Tuple[int, int]]
+    came_from: Dict[Tuple[int, int], Tuple[int, int]]
 
-    def __init__(self, grid: DataGrid):
+    def __init__(self, grid: DataGrid, start: Optional[Tuple[int, int]] = None,
+                 goal: Optional[Tuple[int, int]] = None):
         """Set up the Breadth First Search algorithm"""
-        super().__init__(grid)
-        self.find_neighbors(grid)
-        self.queue = Queue()
-        self.explored = [self.start]
-        self.queue.put(self.start)
+        super().__init__(grid, start, goal)
+        self.queue = deque([self.start])
+        self.explored = {self.start.pos}
+        # Parent of every explored cell
+        self.came_from = {}
 
         self.done = False
 
@@ -28,54 +31,37 @@ class BreadthFirstSearch(Algorithm):
         Reference:
         https://en.wikipedia.org/wiki/Breadth-first_search
         """
-        current = self.queue.get()
+        probe = self.probe
+        current = self.queue.popleft()
         current.set_value(CellValue.CONSIDERED)
-        if current is self.goal:
+        self.expanded += 1
+        if probe is not None:
+            probe.pop(current.pos)
+            probe.expand(current.pos)
+        if current.pos == self.goal.pos:
             self.done = True
+            self.found = True
             self.show_path(grid)
-            print("Path found")
             return True
         for neighbor in current.neighbors:
-            if neighbor not in self.explored:
-                self.explored.append(neighbor)
-                self.queue.put(neighbor)
+            if neighbor.pos not in self.explored:
+                self.explored.add(neighbor.pos)
+                self.came_from[neighbor.pos] = current.pos
+                self.queue.append(neighbor)
                 neighbor.set_value(CellValue.CONSIDERING)
+                if probe is not None:
+                    probe.push(neighbor.pos, len(self.queue))
 
-        if self.queue.empty():
+        if not self.queue:
             self.done = True
-            print("No path found")
             return True
 
         return False
 
-    def show_path(self, grid: DataGrid):
-        """Mark the path"""
-        current = self.goal
-        while current is not self.start:
-            if current is not self.start and current is not self.goal:
-                current.value = CellValue.PATH
-            # Find first appearance of neighbors in visited:
-            for cell in self.explored:
-                if cell in current.neighbors:
-                    current = cell
-                    break
+    def has_path(self) -> bool:
+        """Return True once the goal was reached from a explored cell"""
+        return self.found or self.goal.pos in self.came_from
 
-    @staticmethod
-    def find_neighbors(grid: DataGrid):
-        """Identifies the non-blocked neighbors of every cell in the grid"""
-        for col in grid.cells:
-            for cell in col:
-                # Check if the neighbor exists and is open
-                cell.neighbors = []
-                # Left
-                if cell.x > grid.x_min and not grid.cells[cell.x - 1][cell.y].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x - 1][cell.y])
-                # Right
-                if cell.x < grid.x_max and not grid.cells[cell.x + 1][cell.y].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x + 1][cell.y])
-                # Up
-                if cell.y > grid.y_min and not grid.cells[cell.x][cell.y - 1].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x][cell.y - 1])
-                # Down
-                if cell.y < grid.y_max and not grid.cells[cell.x][cell.y + 1].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x][cell.y + 1])
\ No newline at end of file
+    def get_path(self) -> List[Cell]:
+        """Follow the parents back from the goal"""
+        return self.trace_path(self.came_from)
\ No newline at end of file
@@ -0,0 +1,226 @@
+from src.algorithms.algorithm import Algorithm
+from src.data import DataGrid
+from src.cell import Cell, CellValue
+from src.graph import SQRT2, distance
+from heapq import heappush, heappop
+from math import inf
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# Relative tolerance of the key comparison that ends the search, keys tied with the start are processed even if
+# rounding makes them a bit larger
+EPSILON = 1e-9
+
+
+class DStarLite(Algorithm):
+    """A* backwards from the goal that repairs its search when walls or costs change
+
+    g holds the cost of the cheapest path from every expanded cell to the goal, rhs the cost through the best
+    neighbor according to g. Cells where the two differ are inconsistent and queued. After a change only the cells
+    around it get a new rhs, so replanning reprocesses the cells made inconsistent instead of searching everything
+    again. The start may move between searches, km keeps the keys in the queue valid.
+
+    Reference:
+    http://idm-lab.org/bib/abstracts/papers/aaai02b.pdf
+    """
+    name: str = "D* Lite"
+    optimal: bool = True
+
+    g: Dict[Tuple[int, int], float]
+    rhs: Dict[Tuple[int, int], float]
+    # Heap queue of (key, key tie-breaker, count, position), outdated entries are skipped when popped
+    queue: List[Tuple[float, float, int, Tuple[int, int]]]
+    # Current key of every queued position
+    queued: Dict[Tuple[int, int], Tuple[float, float]]
+
+    # Sum of the heuristic distances the start moved by
+    km: float = 0.0
+    # Start position the keys were last computed for
+    last: Tuple[int, int]
+    count: int = 0
+    # Lowest cost of entering a cell, scales the heuristic
+    min_cost: float = 1.0
+
+    # Neighbor masks, walls and costs of the grid the search is based on
+    mask: np.ndarray
+    walls: np.ndarray
+    costs: np.ndarray
+    version: int
+
+    def __init__(self, grid: DataGrid, start: Optional[Tuple[int, int]] = None,
+                 goal: Optional[Tuple[int, int]] = None):
+        """Set up the D* Lite algorithm"""
+        super().__init__(grid, start, goal)
+        # Start and goal follow the ones of the grid when replanning unless they were given explicitly
+        self.follows_grid = start is None and goal is None
+        self.min_cost = grid.min_cost
+        self.last = self.start.pos
+        self.g = {}
+        self.rhs = {self.goal.pos: 0.0}
+        self.queue = []
+        self.queued = {}
+        self.snapshot(grid)
+        self.update_vertex(self.goal.pos)
+
+    def run_algorithm(self, grid: DataGrid):
+        """Process the inconsistent cell with the lowest key"""
+        queue, queued = self.queue, self.queued
+        probe = self.probe
+        while queue and queued.get(queue[0][3]) != queue[0][:2]:
+            # Outdated entry of a cell that was processed or queued with another key since
+            if probe is not None:
+                probe.pop(queue[0][3], stale=True)
+            heappop(queue)
+
+        start = self.start.pos
+        if not queue or (queue[0][0] > self.key(start)[0] * (1 + EPSILON)
+                         and self.rhs.get(start, inf) <= self.g.get(start, inf)):
+            self.done = True
+            # The start itself doesn't need to be expanded, its rhs is the cost of the path
+            self.found = self.rhs.get(start, inf) < inf
+            if self.found:
+                self.show_path(grid)
+            return self.found
+
+        old_key = queue[0][:2]
+        pos = queue[0][3]
+        new_key = self.key(pos)
+        if old_key < new_key:
+            # The key is outdated since the start moved
+            self.push(pos, new_key)
+            return
+        heappop(queue)
+        del queued[pos]
+        self.mark(pos, CellValue.CONSIDERED)
+        self.expanded += 1
+        if probe is not None:
+            probe.pop(pos)
+            probe.expand(pos)
+
+        g = self.g.get(pos, inf)
+        rhs = self.rhs.get(pos, inf)
+        goal = self.goal.pos
+        if g > rhs:
+            # Overconsistent: the cell got cheaper, pass it on to the neighbors
+            self.g[pos] = rhs
+            for neighbor in self.neighbors(pos):
+                if neighbor != goal:
+                    self.rhs[neighbor] = min(self.rhs.get(neighbor, inf), self.cost(neighbor, pos) + rhs)
+                    self.update_vertex(neighbor)
+        else:
+            # Underconsistent: the cell got more expensive, the neighbors that relied on it look for another way
+            self.g[pos] = inf
+            for neighbor in self.neighbors(pos) + [pos]:
+                if neighbor == goal:
+                    continue
+                if neighbor == pos or self.rhs.get(neighbor, inf) == self.cost(neighbor, pos) + g:
+                    self.rhs[neighbor] = self.lookahead(neighbor)
+                    self.update_vertex(neighbor)
+
+    def replan(self, grid: DataGrid) -> bool:
+        """Update the cells around the walls and costs changed since the last search and move the start
+
+        Returns False if the search has to start over, because the goal moved or cells got cheaper than the
+        heuristic allows.
+        """
+        goal = grid.goal_pos if self.follows_grid else self.goal.pos
+        if goal != self.goal.pos or grid.connectivity != self.connectivity or grid.min_cost < self.min_cost:
+            return False
+        if self.follows_grid and grid.start_pos != self.start.pos:
+            self.move_to(grid.start_pos)
+
+        if grid.version != self.version:
+            walls = grid.values == CellValue.WALL.value
+            changed = (grid.graph.mask != self.mask) | (walls != self.walls)
+            # Entering a cell of changed cost changes the edges from all of its neighbors
+            cost_changed = grid.costs != self.costs
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    changed[max(dx, 0):grid.cols + min(dx, 0), max(dy, 0):grid.rows + min(dy, 0)] |= \
+                        cost_changed[max(-dx, 0):grid.cols - max(dx, 0), max(-dy, 0):grid.rows - max(dy, 0)]
+            for x, y in np.argwhere(changed).tolist():
+                if (x, y) != goal:
+                    self.rhs[(x, y)] = self.lookahead((x, y))
+                    self.update_vertex((x, y))
+            self.snapshot(grid)
+
+        self.done = False
+        self.found = False
+        self.expanded = 0
+        return True
+
+    def move_to(self, pos: Tuple[int, int]) -> None:
+        """Move the start to pos, e.g. to the next cell of the path"""
+        self.km += self.min_cost * distance(self.last, pos, self.connectivity)
+        self.last = pos
+        self.start = self.grid.cells[pos[0]][pos[1]]
+
+    def snapshot(self, grid: DataGrid) -> None:
+        """Remember the state of grid the search is based on"""
+        self.mask = grid.graph.mask.copy()
+        self.walls = grid.values == CellValue.WALL.value
+        self.costs = grid.costs.copy()
+        self.version = grid.version
+
+    def key(self, pos: Tuple[int, int]) -> Tuple[float, float]:
+        """Return the priority of pos in the queue"""
+        cost = min(self.g.get(pos, inf), self.rhs.get(pos, inf))
+        return cost + self.min_cost * distance(self.start.pos, pos, self.connectivity) + self.km, cost
+
+    def push(self, pos: Tuple[int, int], key: Tuple[float, float]) -> None:
+        """Queue pos with key, any older entry of it becomes outdated"""
+        self.count += 1
+        heappush(self.queue, (key[0], key[1], self.count, pos))
+        if self.probe is not None:
+            self.probe.push(pos, len(self.queue), duplicate=pos in self.queued)
+        self.queued[pos] = key
+
+    def update_vertex(self, pos: Tuple[int, int]) -> None:
+        """Queue pos if it is inconsistent, otherwise remove it from the queue"""
+        if self.g.get(pos, inf) != self.rhs.get(pos, inf):
+            if pos not in self.queued:
+                self.mark(pos, CellValue.CONSIDERING)
+            self.push(pos, self.key(pos))
+        else:
+            self.queued.pop(pos, None)
+
+    def mark(self, pos: Tuple[int, int], value: CellValue) -> None:
+        """Show the state of pos in the frontend, walls added since the last search stay walls"""
+        if self.grid.values.item(pos) != CellValue.WALL.value:
+            self.grid.cells[pos[0]][pos[1]].set_value(value)
+
+    def neighbors(self, pos: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Return the cells pos can be left to (and entered from), none for walls"""
+        if self.grid.values.item(pos) == CellValue.WALL.value:
+            return []
+        return self.grid.neighbors(pos)
+
+    def cost(self, pos: Tuple[int, int], neighbor: Tuple[int, int]) -> float:
+        """Return the cost of moving from pos to neighbor"""
+        if pos[0] != neighbor[0] and pos[1] != neighbor[1]:
+            return SQRT2 * self.grid.costs.item(neighbor)
+        return self.grid.costs.item(neighbor)
+
+    def lookahead(self, pos: Tuple[int, int]) -> float:
+        """Return the cost of the cheapest path to the goal through a neighbor of pos according to g"""
+        return min((self.cost(pos, neighbor) + self.g.get(neighbor, inf) for neighbor in self.neighbors(pos)),
+                   default=inf)
+
+    def has_path(self) -> bool:
+        """Return True once the search from the goal reached the start"""
+        return self.rhs.get(self.start.pos, inf) < inf
+
+    def get_path(self) -> List[Cell]:
+        """Follow the cheapest neighbors according to g from the start to the goal"""
+        current = self.start.pos
+        path = [self.start]
+        seen = {current}
+        while current != self.goal.pos:
+            costs = {neighbor: self.cost(current, neighbor) + self.g.get(neighbor, inf)
+                     for neighbor in self.neighbors(current)}
+            current = min(costs, key=costs.get)
+            if current in seen:
+                break
+            seen.add(current)
+            path.append(self.grid.cells[current[0]][current[1]])
+        return path
@@ -1,82 +1,67 @@
 from src.algorithms.algorithm import Algorithm
 from src.data import DataGrid
 from src.cell import Cell, CellValue
-from queue import LifoQueue
-from typing import List
+from typing import Dict, List, Optional, Set, Tuple
 
 
 class DepthFirstSearch(Algorithm):
     name: str = "Depth First Search"
-    queue: LifoQueue
+    # Stack of (cell, parent) pairs, the parent is the position of the cell that pushed it
+    queue: List[Tuple[Cell, Optional[Tuple[int, int]]]]
 
-    explored: List[Cell]
+    explored: Set[Tuple[int, int]]
+    came_from: Dict[Tuple[int, int], Tuple[int, int]]
 
-    def __init__(self, grid: DataGrid):
-        """Set up the Breadth First Search algorithm"""
-        super().__init__(grid)
-        self.find_neighbors(grid)
-        self.queue = LifoQueue()
-        self.queue.put(self.start)
-        self.explored = []
+    def __init__(self, grid: DataGrid, start: Optional[Tuple[int, int]] = None,
+                 goal: Optional[Tuple[int, int]] = None):
+        """Set up the Depth First Search algorithm"""
+        super().__init__(grid, start, goal)
+        self.queue = [(self.start, None)]
+        self.explored = set()
+        # Parent of every explored cell, set when the cell is explored so the parents form a tree
+        self.came_from = {}
 
         self.done = False
 
     def run_algorithm(self, grid: DataGrid) -> bool:
         """
-        Breadth First Search (BFS) algorithm to find a path from start to goal
+        Depth First Search (DFS) algorithm to find a path from start to goal
 
         Reference:
         https://en.wikipedia.org/wiki/Depth-first_search
         """
-        current = self.queue.get()
+        probe = self.probe
+        current, parent = self.queue.pop()
         current.set_value(CellValue.CONSIDERED)
-        if current is self.goal:
-            self.done = True
-            self.show_path(grid)
-            print("Path found")
-            return True
-        if current not in self.explored:
-            self.explored.append(current)
+        if probe is not None:
+            probe.pop(current.pos, stale=current.pos in self.explored)
+        if current.pos not in self.explored:
+            self.explored.add(current.pos)
+            if parent is not None:
+                self.came_from[current.pos] = parent
+            self.expanded += 1
+            if probe is not None:
+                probe.expand(current.pos)
+            if current.pos == self.goal.pos:
+                self.done = True
+                self.found = True
+                self.show_path(grid)
+                return True
             for neighbor in current.neighbors:
-                self.queue.put(neighbor)
-                if neighbor not in self.explored:
+                if neighbor.pos not in self.explored:
+                    if probe is not None:
+                        # Cells already pushed by another cell are marked as considering
+                        probe.push(neighbor.pos, len(self.queue) + 1,
+                                   duplicate=neighbor.value is CellValue.CONSIDERING)
+                    self.queue.append((neighbor, current.pos))
                     neighbor.set_value(CellValue.CONSIDERING)
 
-        if self.queue.empty():
+        if not self.queue:
             self.done = True
-            print("No path found")
             return True
 
         return False
 
-    def show_path(self, grid: DataGrid):
-        """Mark the path"""
-        current = self.goal
-        while current is not self.start:
-            if current is not self.start and current is not self.goal:
-                current.value = CellValue.PATH
-            # Find first appearance of neighbors in visited:
-            for cell in self.explored:
-                if cell in current.neighbors:
-                    current = cell
-                    break
-
-    @staticmethod
-    def find_neighbors(grid: DataGrid):
-        """Identifies the non-blocked neighbors of every cell in the grid"""
-        for col in grid.cells:
-            for cell in col:
-                # Check if the neighbor exists and is open
-                cell.neighbors = []
-                # Left
-                if cell.x > grid.x_min and not grid.cells[cell.x - 1][cell.y].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x - 1][cell.y])
-                # Right
-                if cell.x < grid.x_max and not grid.cells[cell.x + 1][cell.y].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x + 1][cell.y])
-                # Up
-                if cell.y > grid.y_min and not grid.cells[cell.x][cell.y - 1].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x][cell.y - 1])
-                # Down
-                if cell.y < grid.y_max and not grid.cells[cell.x][cell.y + 1].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x][cell.y + 1])
\ No newline at end of file
+    def get_path(self) -> List[Cell]:
+        """Follow the parents back from the goal"""
+        return self.trace_path(self.came_from)
\ No newline at end of file
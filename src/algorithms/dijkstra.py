@@ -1,99 +1,109 @@
 from src.algorithms.algorithm import Algorithm
 from src.data import DataGrid
+from src.workspace import Workspace
 from src.cell import Cell, CellValue
-from queue import PriorityQueue
+from src.graph import SQRT2
+from heapq import heappush, heappop
 from math import inf
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Set, Tuple, Optional
 
 
 class Dijkstra(Algorithm):
     name: str = "Dijkstra"
+    optimal: bool = True
     start: Cell
     goal: Cell
 
-    dist: Dict[Tuple[int, int], float]
-    prev: Dict[Tuple[int, int], Optional[Cell]]
-    visited: Dict[Tuple[int, int], bool]
+    # Distances live in the scores of the workspace, entries of other generations are infinite
+    workspace: Workspace
+    generation: int
+    prev: Dict[Tuple[int, int], Tuple[int, int]]
+    visited: Set[Tuple[int, int]]
 
-    q: PriorityQueue
+    q: List[Tuple[float, Tuple[int, int]]]
 
-    def __init__(self, grid: DataGrid) -> None:
-        super().__init__(grid)
+    def __init__(self, grid: DataGrid, start: Optional[Tuple[int, int]] = None,
+                 goal: Optional[Tuple[int, int]] = None) -> None:
+        super().__init__(grid, start, goal)
 
-        self.find_neighbors(grid)
+        # Create a heap queue
+        self.q = []
 
-        # Create a heap queue object
-        self.q = PriorityQueue()
-
-        # Set initial distances
-        self.dist = {cell.pos: inf for row in grid.cells for cell in row}
+        # Set initial distances, claiming the workspace makes all of them infinite
+        self.workspace = grid.claim_workspace(self)
+        self.generation = self.workspace.generation
         # Define the priority of the start cell and insert into queue
-        self.dist[self.start.pos] = 0
-        self.q.put((self.dist[self.start.pos], self.start.pos))
+        self.set_dist(self.start.pos, 0)
+        heappush(self.q, (0, self.start.pos))
 
         # Save the path in here
         self.prev = {}
 
-        self.visited = {cell.pos: False for row in grid.cells for cell in row}
+        self.visited = set()
 
     def run_algorithm(self, grid: DataGrid):
-        # Get lowest
-        x, y = self.q.get()[1]
+        # Get lowest. Cells can be in the queue more than once, the entries popped after the cell was visited
+        # are outdated and skipped (lazy deletion)
+        probe = self.probe
+        x, y = heappop(self.q)[1]
         current = grid.cells[x][y]
         current.set_value(CellValue.CONSIDERED)
-        if not self.visited[current.pos]:
-            self.visited[current.pos] = True
-            if current == self.goal:
-                print("Path found")
+        if probe is not None:
+            probe.pop(current.pos, stale=current.pos in self.visited)
+        if current.pos not in self.visited:
+            self.visited.add(current.pos)
+            self.expanded += 1
+            if probe is not None:
+                probe.expand(current.pos)
+            if current.pos == self.goal.pos:
                 self.done = True
+                self.found = True
                 self.show_path(grid)
                 return True
 
+            # The weight of an edge is the cost of entering the neighbor, times SQRT2 for diagonal steps
+            costs = grid.costs
+            workspace, generation = self.workspace, self.generation
+            stamps, scores, rows = workspace.stamps, workspace.scores, workspace.rows
+            current_dist = scores[x * rows + y]
             for neighbor in current.neighbors:
-                if not self.visited[neighbor.pos]:
-                    alt = self.dist[current.pos] + self.d(current.pos, neighbor.pos)
-                    if alt < self.dist[neighbor.pos]:
-                        self.dist[neighbor.pos] = alt
+                if neighbor.pos not in self.visited:
+                    weight = costs.item(neighbor.pos)
+                    if neighbor.x != x and neighbor.y != y:
+                        weight *= SQRT2
+                    alt = current_dist + weight
+                    index = neighbor.x * rows + neighbor.y
+                    # A cell with a distance of this generation was pushed before and is still queued
+                    queued = stamps[index] == generation
+                    if not queued or alt < scores[index]:
+                        if probe is not None:
+                            probe.push(neighbor.pos, len(self.q) + 1, duplicate=queued)
+                        stamps[index] = generation
+                        scores[index] = alt
                         # self.prev[neighbor.pos] = current.pos
-                        self.prev[neighbor.pos] = current
-                        self.q.put((self.dist[current.pos], neighbor.pos))
+                        self.prev[neighbor.pos] = current.pos
+                        heappush(self.q, (alt, neighbor.pos))
                         neighbor.set_value(CellValue.CONSIDERING)
-        if self.q.empty():
+        if not self.q:
             self.done = True
-            print("No path found")
             return False
 
-    def show_path(self, grid):
-        current = self.goal
-        while current.pos in self.prev:
-            current = self.prev[current.pos]
-            if current is not self.start:
-                current.value = CellValue.PATH
-
-    @staticmethod
-    def d(current, neighbor):
-        """Return the weight of the edge from current to neighbor
-
-        --- Not implemented at this point ---
-        """
-        return 1
-
-    @staticmethod
-    def find_neighbors(grid: DataGrid) -> None:
-        """Identifies the non-blocked neighbors of every cell in the grid"""
-        for col in grid.cells:
-            for cell in col:
-                # Check if the neighbor exists and is open
-                cell.neighbors = []
-                # Left
-                if cell.x > grid.x_min and not grid.cells[cell.x - 1][cell.y].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x - 1][cell.y])
-                # Right
-                if cell.x < grid.x_max and not grid.cells[cell.x + 1][cell.y].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x + 1][cell.y])
-                # Up
-                if cell.y > grid.y_min and not grid.cells[cell.x][cell.y - 1].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x][cell.y - 1])
-                # Down
-                if cell.y < grid.y_max and not grid.cells[cell.x][cell.y + 1].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x][cell.y + 1])
\ No newline at end of file
+    def dist(self, pos: Tuple[int, int]) -> float:
+        """Return the distance of pos from the start found so far, inf if pos wasn't reached"""
+        index = pos[0] * self.workspace.rows + pos[1]
+        if self.workspace.stamps[index] != self.generation:
+            return inf
+        return self.workspace.scores[index]
+
+    def set_dist(self, pos: Tuple[int, int], dist: float) -> None:
+        """Store the distance of pos from the start found so far"""
+        index = pos[0] * self.workspace.rows + pos[1]
+        self.workspace.stamps[index] = self.generation
+        self.workspace.scores[index] = dist
+
+    def has_path(self) -> bool:
+        """Return True once the goal was reached from a visited cell"""
+        return self.found or self.goal.pos in self.prev
+
+    def get_path(self) -> List[Cell]:
+        return self.trace_path(self.prev)
\ No newline at end of file
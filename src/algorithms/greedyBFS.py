@@ -1,28 +1,31 @@
 from src.algorithms.algorithm import Algorithm
 from src.data import DataGrid
 from src.cell import Cell, CellValue
-from queue import PriorityQueue
-from typing import List
+from heapq import heappush, heappop
+from typing import Dict, List, Optional, Set, Tuple
 
 
 class GreedyBFS(Algorithm):
     name: str = "Greedy Best First Search"
-    queue: PriorityQueue
+    queue: List[Tuple[int, int, Cell]]
 
-    visited: List[Cell]
+    visited: Set[Tuple[int, int]]
+    came_from: Dict[Tuple[int, int], Tuple[int, int]]
 
-    def __init__(self, grid: DataGrid):
+    def __init__(self, grid: DataGrid, start: Optional[Tuple[int, int]] = None,
+                 goal: Optional[Tuple[int, int]] = None):
         """Set up the Greedy Best First Search algorithm"""
-        super().__init__(grid)
-
-        self.find_neighbors(grid)
+        super().__init__(grid, start, goal)
 
         self.done = False
 
-        self.visited = []
+        self.visited = set()
+        # Parent of every discovered cell
+        self.came_from = {}
 
-        self.queue = PriorityQueue()
-        self.queue.put((self.h(self.start, self.goal), self.start))
+        # Heap queue of (score, count, cell), count is a tie-breaker in case cells have equal scores
+        self.count = 0
+        self.queue = [(self.h(self.start, self.goal), self.count, self.start)]
 
     def run_algorithm(self, grid: DataGrid):
         """
@@ -31,67 +34,43 @@ class GreedyBFS(Algorithm):
         Reference:
         https://en.wikipedia.org/wiki/Best-first_search#Greedy_BFS
         """
-        _, current = self.queue.get()
-
-        if current not in self.visited:
-            self.visited.append(current)
-            if current == self.goal:
+        probe = self.probe
+        current = heappop(self.queue)[2]
+        if probe is not None:
+            probe.pop(current.pos, stale=current.pos in self.visited)
+
+        if current.pos not in self.visited:
+            self.visited.add(current.pos)
+            self.expanded += 1
+            if probe is not None:
+                probe.expand(current.pos)
+            if current.pos == self.goal.pos:
                 self.done = True
+                self.found = True
                 self.show_path(grid)
-                print("Path found")
                 return True
             for neighbor in current.neighbors:
                 # Queue any new neighbors according to their score
-                if neighbor not in self.visited:
+                if neighbor.pos not in self.visited and neighbor.pos not in self.came_from:
+                    self.came_from[neighbor.pos] = current.pos
                     neighbor.set_value(CellValue.CONSIDERING)
-                    self.queue.put((self.h(neighbor, self.goal), neighbor))
+                    self.count += 1
+                    heappush(self.queue, (self.h(neighbor, self.goal), self.count, neighbor))
+                    if probe is not None:
+                        probe.push(neighbor.pos, len(self.queue))
             current.set_value(CellValue.CONSIDERED)
 
-        if self.queue.empty():
+        if not self.queue:
             self.done = True
-            print("No path found")
-
-    @staticmethod
-    def d(current, neighbor):
-        """Return the weight of the edge from current to neighbor
-
-        --- Not implemented at this point ---
-        """
-        return 1
 
-    @staticmethod
-    def h(n1: Cell, n2: Cell):
-        """Return the Manhattan distance of two nodes"""
-        return abs(n1.x - n2.x) + abs(n1.y - n2.y)
+    def h(self, n1: Cell, n2: Cell):
+        """Return the Manhattan or octile distance of two nodes"""
+        return self.distance(n1, n2)
 
-    def show_path(self, grid: DataGrid):
-        """Mark the path"""
-        current = self.goal
-        while current is not self.start:
-            if current is not self.start and current is not self.goal:
-                current.value = CellValue.PATH
-            # Find first appearance of neighbors in visited:
-            for cell in self.visited:
-                if cell in current.neighbors:
-                    current = cell
-                    break
+    def has_path(self) -> bool:
+        """Return True once the goal was reached from a visited cell"""
+        return self.found or self.goal.pos in self.came_from
 
-    @staticmethod
-    def find_neighbors(grid: DataGrid):
-        """Identifies the non-blocked neighbors of every cell in the grid"""
-        for col in grid.cells:
-            for cell in col:
-                # Check if the neighbor exists and is open
-                cell.neighbors = []
-                # Left
-                if cell.x > grid.x_min and not grid.cells[cell.x - 1][cell.y].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x - 1][cell.y])
-                # Right
-                if cell.x < grid.x_max and not grid.cells[cell.x + 1][cell.y].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x + 1][cell.y])
-                # Up
-                if cell.y > grid.y_min and not grid.cells[cell.x][cell.y - 1].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x][cell.y - 1])
-                # Down
-                if cell.y < grid.y_max and not grid.cells[cell.x][cell.y + 1].value == CellValue.WALL:
-                    cell.neighbors.append(grid.cells[cell.x][cell.y + 1])
\ No newline at end of file
+    def get_path(self) -> List[Cell]:
+        """Follow the parents back from the goal"""
+        return self.trace_path(self.came_from)
\ No newline at end of file
@@ -0,0 +1,217 @@
+from src.algorithms.algorithm import Algorithm
+from src.data import DataGrid
+from src.cell import Cell, CellValue
+from src.graph import CornerCutting, DIAGONALS, DIRECTIONS, distance
+from heapq import heappush, heappop
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class JumpPointSearch(Algorithm):
+    """A* on the jump points of a uniform-cost grid
+
+    The cell costs of the grid are ignored, on weighted grids the path found is the shortest but not necessarily
+    the cheapest one.
+
+    On 4-connected grids horizontal moves continue until a vertical scan from the current cell finds a jump point.
+    Vertical moves continue until a cell has an open side whose cell behind is blocked (a forced neighbor).
+    On 8-connected grids straight moves stop at forced neighbors and diagonal moves stop where one of the straight
+    scans along their axes finds a jump point. Which neighbors are forced depends on the corner cutting rule.
+    Only the cells where a move has to stop are put on the open set, the runs between them are skipped.
+
+    Reference:
+    https://en.wikipedia.org/wiki/Jump_point_search
+    """
+    name: str = "Jump Point Search"
+    optimal: bool = True
+
+    # Heap queue of (f_score, count, cell, direction the cell was reached in)
+    open_set: List[Tuple[int, int, Cell, Tuple[int, int]]]
+    open_positions: Set[Tuple[int, int]]
+
+    came_from: Dict[Tuple[int, int], Tuple[int, int]]
+    g_score: Dict[Tuple[int, int], float]
+
+    count: int = 0
+
+    def __init__(self, grid: DataGrid, start: Optional[Tuple[int, int]] = None,
+                 goal: Optional[Tuple[int, int]] = None):
+        """Set up the Jump Point Search algorithm"""
+        super().__init__(grid, start, goal)
+        self.corner_cutting = grid.corner_cutting
+        # Direction bits of the neighbor mask, every move is checked against the neighbor graph
+        self.bits = {(dx, dy): bit for bit, dx, dy in DIRECTIONS + DIAGONALS}
+
+        self.g_score = {self.start.pos: 0}
+        self.came_from = {}
+
+        # The start cell is left in all directions
+        self.open_set = [(self.h(self.start.pos, self.goal.pos), self.count, self.start, (0, 0))]
+        self.open_positions = {self.start.pos}
+
+    def run_algorithm(self, grid: DataGrid):
+        """Expand the jump point with the lowest f score"""
+        probe = self.probe
+        _, _, current, direction = heappop(self.open_set)
+        while current.pos not in self.open_positions:
+            # Outdated entry of a jump point that was already popped with a lower f score
+            if probe is not None:
+                probe.pop(current.pos, stale=True)
+            _, _, current, direction = heappop(self.open_set)
+        self.open_positions.remove(current.pos)
+
+        current.set_value(CellValue.CONSIDERED)
+        self.expanded += 1
+        if probe is not None:
+            probe.pop(current.pos)
+            probe.expand(current.pos)
+
+        if current.pos == self.goal.pos:
+            self.done = True
+            self.found = True
+            self.show_path(grid)
+            return True
+
+        x, y = current.pos
+        jump = self.jump if self.connectivity == 4 else self.jump_8
+        for dx, dy in self.directions(x, y, direction):
+            jump_point = jump(x, y, dx, dy)
+            if jump_point is None:
+                continue
+            # Jump points are always reached on a straight or diagonal line
+            tentative_g_score = self.g_score[current.pos] + self.h((x, y), jump_point)
+            if tentative_g_score < self.g_score.get(jump_point, tentative_g_score + 1):
+                neighbor = grid.cells[jump_point[0]][jump_point[1]]
+                self.came_from[jump_point] = current.pos
+                self.g_score[jump_point] = tentative_g_score
+                self.count += 1
+                heappush(self.open_set, (tentative_g_score + self.h(jump_point, self.goal.pos), self.count,
+                                         neighbor, (dx, dy)))
+                if probe is not None:
+                    probe.push(jump_point, len(self.open_set), duplicate=jump_point in self.open_positions)
+                if jump_point not in self.open_positions:
+                    self.open_positions.add(jump_point)
+                    neighbor.set_value(CellValue.CONSIDERING)
+
+        if not self.open_positions:
+            self.done = True
+            return False
+
+    def directions(self, x: int, y: int, direction: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Return the directions to continue in from the jump point (x, y), reached by moving in direction"""
+        dx, dy = direction
+        if dx == 0 and dy == 0:
+            return [(nx - x, ny - y) for nx, ny in self.grid.neighbors((x, y))]
+        if self.connectivity == 8:
+            return self.directions_8(x, y, dx, dy)
+        if dx:
+            # Horizontal moves continue straight and scan both vertical directions
+            return [(dx, 0), (0, 1), (0, -1)]
+        # Vertical moves continue straight and turn towards forced neighbors
+        directions = [(0, dy)]
+        for sx in (-1, 1):
+            if self.is_open(x + sx, y) and not self.is_open(x + sx, y - dy):
+                directions.append((sx, 0))
+        return directions
+
+    def jump(self, x: int, y: int, dx: int, dy: int) -> Optional[Tuple[int, int]]:
+        """Move from (x, y) in direction (dx, dy) and return the next jump point (None if a wall is hit first)"""
+        goal = self.goal.pos
+        while True:
+            x += dx
+            y += dy
+            if not self.is_open(x, y):
+                return None
+            if (x, y) == goal:
+                return x, y
+            if dx:
+                # Stop where one of the vertical scans finds a jump point
+                if self.jump(x, y, 0, 1) is not None or self.jump(x, y, 0, -1) is not None:
+                    return x, y
+            else:
+                # Stop at forced neighbors: an open side cell that can't be reached from the cell behind
+                for sx in (-1, 1):
+                    if self.is_open(x + sx, y) and not self.is_open(x + sx, y - dy):
+                        return x, y
+
+    def directions_8(self, x: int, y: int, dx: int, dy: int) -> List[Tuple[int, int]]:
+        """Return the directions to continue in from the jump point (x, y) of an 8-connected grid
+
+        Moves that aren't allowed by the neighbor graph are dropped by jump_8.
+        """
+        if self.corner_cutting is CornerCutting.NEVER:
+            if dx and dy:
+                return [(dx, dy), (dx, 0), (0, dy)]
+            if dx:
+                return [(dx, 0), (dx, 1), (dx, -1), (0, 1), (0, -1)]
+            return [(0, dy), (1, dy), (-1, dy), (1, 0), (-1, 0)]
+        # Moves past a wall corner: the cell diagonally behind the wall can only be reached from here
+        if dx and dy:
+            directions = [(dx, dy), (dx, 0), (0, dy)]
+            if not self.is_open(x - dx, y):
+                directions.append((-dx, dy))
+            if not self.is_open(x, y - dy):
+                directions.append((dx, -dy))
+            return directions
+        if dx:
+            return [(dx, 0)] + [(dx, sy) for sy in (-1, 1) if not self.is_open(x, y + sy)]
+        return [(0, dy)] + [(sx, dy) for sx in (-1, 1) if not self.is_open(x + sx, y)]
+
+    def jump_8(self, x: int, y: int, dx: int, dy: int) -> Optional[Tuple[int, int]]:
+        """Move from (x, y) in direction (dx, dy) on an 8-connected grid and return the next jump point"""
+        goal = self.goal.pos
+        mask = self.grid.graph.mask
+        bit = self.bits[(dx, dy)]
+        never = self.corner_cutting is CornerCutting.NEVER
+        while True:
+            if not mask.item(x, y) & bit:
+                return None
+            x += dx
+            y += dy
+            if (x, y) == goal:
+                return x, y
+            if dx and dy:
+                if not never and (self.is_open(x - dx, y + dy) and not self.is_open(x - dx, y)
+                                  or self.is_open(x + dx, y - dy) and not self.is_open(x, y - dy)):
+                    return x, y
+                # Stop where one of the straight scans finds a jump point
+                if self.jump_8(x, y, dx, 0) is not None or self.jump_8(x, y, 0, dy) is not None:
+                    return x, y
+            elif never:
+                # Stop at open side cells whose cell behind is blocked, they can't be reached from behind
+                if dx and any(self.is_open(x, y + s) and not self.is_open(x - dx, y + s) for s in (-1, 1)):
+                    return x, y
+                if dy and any(self.is_open(x + s, y) and not self.is_open(x + s, y - dy) for s in (-1, 1)):
+                    return x, y
+            else:
+                # Stop next to wall corners, the cells diagonally ahead of them can only be reached from here
+                if dx and any(self.is_open(x + dx, y + s) and not self.is_open(x, y + s) for s in (-1, 1)):
+                    return x, y
+                if dy and any(self.is_open(x + s, y + dy) and not self.is_open(x + s, y) for s in (-1, 1)):
+                    return x, y
+
+    def is_open(self, x: int, y: int) -> bool:
+        """Return True if (x, y) is in the grid and not a wall"""
+        grid = self.grid
+        return 0 <= x < grid.cols and 0 <= y < grid.rows and grid.values.item(x, y) != CellValue.WALL.value
+
+    def h(self, p1: Tuple[int, int], p2: Tuple[int, int]) -> float:
+        """Return the Manhattan or octile distance of two positions"""
+        return distance(p1, p2, self.connectivity)
+
+    def has_path(self) -> bool:
+        """Return True once the goal was reached from a jump point"""
+        return self.found or self.goal.pos in self.came_from
+
+    def get_path(self) -> List[Cell]:
+        """Follow the jump points back from the goal and fill in the straight or diagonal runs between them"""
+        jump_points = self.trace_path(self.came_from)
+        path = [jump_points[0]]
+        for cell in jump_points[1:]:
+            x, y = path[-1].pos
+            dx = (cell.x > x) - (cell.x < x)
+            dy = (cell.y > y) - (cell.y < y)
+            while (x, y) != cell.pos:
+                x += dx
+                y += dy
+                path.append(self.grid.cells[x][y])
+        return path
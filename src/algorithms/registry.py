@@ -0,0 +1,13 @@
+from src.algorithms.astar import AStar
+from src.algorithms.jumpPointSearch import JumpPointSearch
+from src.algorithms.bidirectionalAStar import BidirectionalAStar
+from src.algorithms.dStarLite import DStarLite
+from src.algorithms.dijkstra import Dijkstra
+from src.algorithms.greedyBFS import GreedyBFS
+from src.algorithms.breadthFirstSearch import BreadthFirstSearch
+from src.algorithms.bidirectionalBFS import BidirectionalBFS
+from src.algorithms.depthFirstSearch import DepthFirstSearch
+
+# Add additional algorithms to this list:
+algorithms = [Dijkstra, AStar, BidirectionalAStar, JumpPointSearch, DStarLite, GreedyBFS, BreadthFirstSearch,
+              BidirectionalBFS, DepthFirstSearch]
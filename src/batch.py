@@ -0,0 +1,83 @@
+"""Solve many start/goal pairs on one grid in a pool of worker processes
+
+The value and cost arrays of the grid are put into shared memory once. Every worker copies them into a grid of
+its own when it starts (the searches mark the cells they visit), so the tasks only carry the positions.
+"""
+from dataclasses import dataclass
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterator, List, Optional, Sequence, Tuple, Type
+import numpy as np
+from src.data import DataGrid
+from src.graph import CornerCutting
+from src.algorithms.algorithm import Algorithm
+from src.solver import SolveResult, solve
+
+# Grid and algorithm of the current worker process, set up by init_worker
+worker_grid: Optional[DataGrid] = None
+worker_algorithm: Optional[Type[Algorithm]] = None
+
+
+@dataclass
+class BatchResult:
+    """Result of one query of a batch"""
+    # Position of the query in the list of pairs
+    index: int
+    start: Tuple[int, int]
+    goal: Tuple[int, int]
+    result: SolveResult
+
+
+def share(array: np.ndarray) -> SharedMemory:
+    """Return a shared memory block holding a copy of array"""
+    memory = SharedMemory(create=True, size=array.nbytes)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[...] = array
+    return memory
+
+
+def init_worker(values_name: str, costs_name: str, rows: int, cols: int, connectivity: int,
+                corner_cutting: CornerCutting, start_pos: Tuple[int, int], goal_pos: Tuple[int, int],
+                algorithm: Type[Algorithm]) -> None:
+    """Set up the grid of a worker process from the shared arrays"""
+    global worker_grid, worker_algorithm
+    grid = DataGrid(rows, cols, compact=True, connectivity=connectivity, corner_cutting=corner_cutting)
+    for name, array in ((values_name, grid.values), (costs_name, grid.costs)):
+        memory = SharedMemory(name=name)
+        array[...] = np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)
+        memory.close()
+    grid.min_cost = float(grid.costs.min())
+    grid.start_pos, grid.goal_pos = start_pos, goal_pos
+    grid.walls_replaced()
+    # Drop the marks of any search that ran on the original grid
+    grid.reset()
+    worker_grid = grid
+    worker_algorithm = algorithm
+
+
+def solve_task(task: Tuple[int, Tuple[int, int], Tuple[int, int]]) -> BatchResult:
+    """Solve one query in a worker process"""
+    index, start, goal = task
+    result = solve(worker_grid, worker_algorithm, start, goal)
+    worker_grid.reset()
+    return BatchResult(index, start, goal, result)
+
+
+def solve_batch(grid: DataGrid, algorithm: Type[Algorithm], pairs: Sequence[Tuple[Tuple[int, int], Tuple[int, int]]],
+                processes: Optional[int] = None, chunksize: int = 8) -> Iterator[BatchResult]:
+    """Solve every (start, goal) pair of pairs with algorithm and yield the results in the order they finish
+
+    The work is spread over processes worker processes (one per core by default), which receive the queries in
+    chunks of chunksize. The grid must not be changed while the results are consumed.
+    """
+    memories: List[SharedMemory] = []
+    try:
+        memories = [share(grid.values), share(grid.costs)]
+        initargs = (memories[0].name, memories[1].name, grid.rows, grid.cols, grid.connectivity,
+                    grid.corner_cutting, grid.start_pos, grid.goal_pos, algorithm)
+        tasks = ((index, tuple(start), tuple(goal)) for index, (start, goal) in enumerate(pairs))
+        with Pool(processes, initializer=init_worker, initargs=initargs) as pool:
+            yield from pool.imap_unordered(solve_task, tasks, chunksize)
+    finally:
+        for memory in memories:
+            memory.close()
+            memory.unlink()
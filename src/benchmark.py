@@ -0,0 +1,263 @@
+"""Benchmark the registered algorithms on generated grids
+
+Usage:
+    py -m src.benchmark --sizes 30 100 300 --kinds open random maze --densities 0.1 0.3 --json results.json
+"""
+import argparse
+import json
+import random
+import tracemalloc
+from heapq import heappush, heappop
+from dataclasses import dataclass, asdict
+from time import perf_counter
+from typing import List, Optional, Tuple, Type
+import numpy as np
+from src.data import DataGrid
+from src.graph import SQRT2
+from src.algorithms.algorithm import Algorithm
+from src.algorithms.registry import algorithms
+from src.instrument import Instrumentation
+
+KINDS = ("open", "random", "maze")
+
+
+@dataclass
+class BenchmarkResult:
+    """Measurements of one algorithm on one generated grid"""
+    kind: str
+    size: int
+    density: float
+    seed: int
+    algorithm: str
+    found: bool
+    timed_out: bool
+    expanded: int
+    elapsed: float
+    expansions_per_sec: float
+    # Seconds until the first path was found, before the search made sure it's the best (None if no path was found)
+    time_to_path: Optional[float]
+    # Peak memory allocated by the search in bytes (None if not measured)
+    peak_memory: Optional[int]
+    cost: Optional[float]
+    optimal_cost: Optional[float]
+    # Ratio of the path cost to the optimal cost (1.0 is optimal)
+    optimality: Optional[float]
+    # Elapsed time of the baseline algorithm on the same grid divided by the elapsed time of this one
+    speedup: Optional[float] = None
+    # Counters and step timings of an instrumented run (None if not collected)
+    stats: Optional[dict] = None
+
+
+def maze_walls(cols: int, rows: int, rng: random.Random) -> np.ndarray:
+    """Return the walls of a perfect maze with passages on the odd coordinates (recursive backtracker)"""
+    walls = np.ones((cols, rows), dtype=bool)
+    nx, ny = (cols - 1) // 2, (rows - 1) // 2
+    visited = [[False] * ny for _ in range(nx)]
+    visited[0][0] = True
+    walls[1, 1] = False
+    stack = [(0, 0)]
+    while stack:
+        cx, cy = stack[-1]
+        options = [(cx + dx, cy + dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                   if 0 <= cx + dx < nx and 0 <= cy + dy < ny and not visited[cx + dx][cy + dy]]
+        if not options:
+            stack.pop()
+            continue
+        x, y = rng.choice(options)
+        visited[x][y] = True
+        # Open the cell and the wall between it and the current cell
+        walls[2 * x + 1, 2 * y + 1] = False
+        walls[cx + x + 1, cy + y + 1] = False
+        stack.append((x, y))
+    return walls
+
+
+def make_grid(kind: str, size: int, density: float = 0.0, seed: int = 0, connectivity: int = 4) -> DataGrid:
+    """Generate a seeded size x size grid with start and goal in opposite corners"""
+    grid = DataGrid(size, size, compact=True, connectivity=connectivity)
+    # Odd coordinates are passages in mazes, so use them for all kinds
+    last = size - 2 if size % 2 else size - 3
+    grid.remove_start()
+    grid.remove_goal()
+    grid.set_start((1, 1))
+    grid.set_goal((last, last))
+
+    if kind == "random":
+        walls = np.random.default_rng(seed).random((size, size)) < density
+        grid.set_walls(walls)
+    elif kind == "maze":
+        grid.set_walls(maze_walls(size, size, random.Random(seed)))
+    elif kind != "open":
+        raise ValueError(f"Unknown grid kind: {kind}")
+    return grid
+
+
+def optimal_cost(grid: DataGrid) -> Optional[float]:
+    """Return the cost of the cheapest path from start to goal (None if there is none)"""
+    dist = {grid.start_pos: 0}
+    queue = [(0, grid.start_pos)]
+    while queue:
+        cost, pos = heappop(queue)
+        if pos == grid.goal_pos:
+            return cost
+        if cost > dist[pos]:
+            continue
+        for neighbor in grid.neighbors(pos):
+            weight = grid.costs.item(neighbor)
+            if neighbor[0] != pos[0] and neighbor[1] != pos[1]:
+                weight *= SQRT2
+            if cost + weight < dist.get(neighbor, float("inf")):
+                dist[neighbor] = cost + weight
+                heappush(queue, (cost + weight, neighbor))
+    return None
+
+
+def run(grid: DataGrid, algorithm: Type[Algorithm], timeout: float,
+        probe: Optional[Instrumentation] = None) -> Tuple[Algorithm, float, bool, Optional[float]]:
+    """Step algorithm until it is done or timeout seconds have passed, reporting to probe if it is given
+
+    Returns the algorithm object, the elapsed time, whether the search timed out and the seconds until the step
+    that found the first path, which may still be improved on (None if no path was found).
+    """
+    begin = perf_counter()
+    algo = algorithm(grid)
+    if probe is not None:
+        algo.instrument(probe)
+    steps = 0
+    time_to_path = None
+    while not algo.is_done():
+        algo.step(grid)
+        steps += 1
+        if time_to_path is None and algo.has_path():
+            time_to_path = perf_counter() - begin
+        # Checking the clock on every step would distort the measurement
+        if steps % 1024 == 0 and perf_counter() - begin > timeout:
+            break
+    elapsed = perf_counter() - begin
+    grid.reset()
+    return algo, elapsed, not algo.is_done(), time_to_path
+
+
+def benchmark(grid: DataGrid, algorithm: Type[Algorithm], timeout: float, measure_memory: bool,
+              reference: Optional[float], collect_stats: bool = False) -> dict:
+    """Measure algorithm on grid and return the fields of a BenchmarkResult that depend on the search"""
+    algo, elapsed, timed_out, time_to_path = run(grid, algorithm, timeout)
+
+    stats = None
+    if collect_stats:
+        # Like the memory, the statistics are collected in a separate run so they don't distort the timing
+        probe = Instrumentation()
+        run(grid, algorithm, timeout, probe)
+        stats = probe.to_dict()
+
+    peak_memory = None
+    if measure_memory and not timed_out:
+        # tracemalloc slows the search down, so the memory is measured in a separate run
+        tracemalloc.start()
+        run(grid, algorithm, timeout)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    cost = grid.path_cost([cell.pos for cell in algo.get_path()]) if algo.found else None
+    return dict(
+        algorithm=algorithm.name,
+        found=algo.found,
+        timed_out=timed_out,
+        expanded=algo.expanded,
+        elapsed=elapsed,
+        expansions_per_sec=algo.expanded / elapsed if elapsed > 0 else 0.0,
+        time_to_path=time_to_path,
+        peak_memory=peak_memory,
+        cost=cost,
+        optimal_cost=reference,
+        optimality=cost / reference if cost is not None and reference else None,
+        stats=stats,
+    )
+
+
+def select_algorithms(names: Optional[List[str]], baseline: Optional[str] = None) -> List[Type[Algorithm]]:
+    """Return the registered algorithms matching names (by class name or display name), baseline first"""
+    names = names or [algo.__name__ for algo in algorithms]
+    if baseline:
+        names = [baseline] + [name for name in names if name != baseline]
+    selected = []
+    for name in names:
+        matches = [algo for algo in algorithms if name in (algo.__name__, algo.name)]
+        if not matches:
+            raise ValueError(f"Unknown algorithm: {name}")
+        if matches[0] not in selected:
+            selected.append(matches[0])
+    return selected
+
+
+def run_suite(sizes: List[int], kinds: List[str], densities: List[float], seed: int,
+              selected: List[Type[Algorithm]], timeout: float, measure_memory: bool,
+              connectivity: int = 4, collect_stats: bool = False) -> List[BenchmarkResult]:
+    """Run every selected algorithm on every generated grid
+
+    The speedup of every algorithm is reported relative to the first selected one.
+    """
+    results = []
+    for kind in kinds:
+        for size in sizes:
+            for density in (densities if kind == "random" else [0.0]):
+                grid = make_grid(kind, size, density, seed, connectivity)
+                reference = optimal_cost(grid)
+                baseline = None
+                for algorithm in selected:
+                    fields = benchmark(grid, algorithm, timeout, measure_memory, reference, collect_stats)
+                    result = BenchmarkResult(kind=kind, size=size, density=density, seed=seed, **fields)
+                    if baseline is None:
+                        baseline = result
+                    if not baseline.timed_out and result.elapsed > 0:
+                        result.speedup = baseline.elapsed / result.elapsed
+                    results.append(result)
+                    print_row(result)
+    return results
+
+
+def print_header() -> None:
+    print(f"{'grid':<8}{'size':>6}{'dens':>6}  {'algorithm':<26}{'found':>6}{'expanded':>10}"
+          f"{'exp/s':>12}{'time ms':>10}{'peak MB':>9}{'optimal':>9}{'speedup':>9}")
+
+
+def print_row(r: BenchmarkResult) -> None:
+    found = "t/o" if r.timed_out else ("yes" if r.found else "no")
+    memory = f"{r.peak_memory / 2 ** 20:.2f}" if r.peak_memory is not None else "-"
+    optimality = f"{r.optimality:.3f}" if r.optimality is not None else "-"
+    speedup = f"{r.speedup:.2f}x" if r.speedup is not None else "-"
+    print(f"{r.kind:<8}{r.size:>6}{r.density:>6.2f}  {r.algorithm:<26}{found:>6}{r.expanded:>10}"
+          f"{r.expansions_per_sec:>12.0f}{r.elapsed * 1000:>10.1f}{memory:>9}{optimality:>9}{speedup:>9}")
+
+
+def main(argv: Optional[List[str]] = None) -> List[BenchmarkResult]:
+    parser = argparse.ArgumentParser(description="Benchmark the registered path finding algorithms")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[30, 100, 300],
+                        help="edge lengths of the generated square grids (30 to 2000)")
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=list(KINDS), help="kinds of grids to generate")
+    parser.add_argument("--densities", type=float, nargs="+", default=[0.1, 0.2, 0.3],
+                        help="wall densities of the random grids")
+    parser.add_argument("--algorithms", nargs="+", help="algorithms to run (default: all registered)")
+    parser.add_argument("--baseline", default="AStar", help="algorithm the speedups are relative to")
+    parser.add_argument("--connectivity", type=int, choices=(4, 8), default=4,
+                        help="neighbors per cell, 8 to allow diagonal moves")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the grid generators")
+    parser.add_argument("--timeout", type=float, default=60.0, help="maximum seconds per search")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory measurement")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON to PATH")
+    parser.add_argument("--stats", action="store_true",
+                        help="collect search counters and step timings in an extra run (written with --json)")
+    args = parser.parse_args(argv)
+
+    print_header()
+    results = run_suite(args.sizes, args.kinds, args.densities, args.seed,
+                        select_algorithms(args.algorithms, args.baseline),
+                        args.timeout, not args.no_memory, args.connectivity, args.stats)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump([asdict(result) for result in results], file, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Optional, Tuple, Type
+import numpy as np
+from src.data import DataGrid, REGION_SIZE
+from src.algorithms.algorithm import Algorithm
+from src.solver import SolveResult, solve
+
+# Estimated memory of an entry besides its arrays (key, dict slot, dataclass)
+ENTRY_OVERHEAD = 400
+
+
+@dataclass
+class CacheEntry:
+    """Result of a search together with the grid versions it is valid for"""
+    # Positions of the path as an (n, 2) array (empty if there is no path)
+    path: np.ndarray
+    cost: float
+    # Grid version the entry was stored at, the entry is valid as long as it doesn't change
+    version: int
+    # Version of removed walls and lowered costs, either can make a path cheaper or connect start and goal
+    cleared_version: int
+    # Indices and versions of the regions the path crosses, a new wall or a higher cost there can block the path
+    # or make it more expensive
+    regions: np.ndarray
+    region_versions: np.ndarray
+    # Results of searches that don't always find a best path depend on cells off the path as well, they are only
+    # valid at the version they were stored at
+    optimal: bool
+
+    @property
+    def size(self) -> int:
+        """Estimated memory of the entry in bytes"""
+        return self.path.nbytes + self.regions.nbytes + self.region_versions.nbytes + ENTRY_OVERHEAD
+
+    def is_valid(self, grid: DataGrid) -> bool:
+        """Return True if the path is still the result of the search on grid"""
+        if grid.version == self.version:
+            return True
+        if not self.optimal or grid.cleared_version != self.cleared_version:
+            return False
+        # Only walls were added or costs raised since. They can't create a cheaper path, but can block this one
+        current = grid.region_versions[self.regions[:, 0], self.regions[:, 1]]
+        return bool((current == self.region_versions).all())
+
+
+class PathCache:
+    """LRU cache of search results on one grid
+
+    Results are keyed on (algorithm, start, goal) and checked against the versions of the grid when they are
+    looked up. A new wall or a raised cost only invalidates the paths of optimal algorithms crossing its region, a
+    removed wall or a lowered cost and any change for the other algorithms invalidate all results.
+    """
+    grid: DataGrid
+    max_bytes: int
+    entries: 'OrderedDict[Tuple[Type[Algorithm], Tuple[int, int], Tuple[int, int]], CacheEntry]'
+    # Estimated memory of all entries in bytes
+    size: int
+    hits: int
+    misses: int
+
+    def __init__(self, grid: DataGrid, max_bytes: int = 64 * 2 ** 20):
+        self.grid = grid
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def solve(self, algorithm: Type[Algorithm], start: Optional[Tuple[int, int]] = None,
+              goal: Optional[Tuple[int, int]] = None) -> SolveResult:
+        """Return the cached result of the search if it is still valid, otherwise search and cache the result
+
+        Cached results report 0 expanded cells and the time of the lookup as elapsed time.
+        """
+        begin = perf_counter()
+        start = self.grid.start_pos if start is None else start
+        goal = self.grid.goal_pos if goal is None else goal
+        key = (algorithm, start, goal)
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry.is_valid(self.grid):
+                self.hits += 1
+                self.entries.move_to_end(key)
+                path = [(x, y) for x, y in entry.path.tolist()]
+                return SolveResult(path, entry.cost, 0, perf_counter() - begin)
+            self.remove(key)
+
+        self.misses += 1
+        result = solve(self.grid, algorithm, start, goal)
+        self.store(key, result)
+        return result
+
+    def store(self, key, result: SolveResult) -> None:
+        """Cache result and evict the least recently used entries until the cache fits into max_bytes"""
+        path = np.array(result.path, dtype=np.int32).reshape(-1, 2)
+        # A new wall at the side of a diagonal step can block it as well
+        before, after = path[:-1], path[1:]
+        diagonal = (before != after).all(axis=1)
+        sides = np.concatenate((np.stack((after[diagonal, 0], before[diagonal, 1]), axis=1),
+                                np.stack((before[diagonal, 0], after[diagonal, 1]), axis=1)))
+        regions = np.unique(np.concatenate((path, sides)) // REGION_SIZE, axis=0)
+        entry = CacheEntry(path, result.cost, self.grid.version, self.grid.cleared_version, regions,
+                           self.grid.region_versions[regions[:, 0], regions[:, 1]], key[0].optimal)
+        if entry.size > self.max_bytes:
+            return
+        self.entries[key] = entry
+        self.size += entry.size
+        while self.size > self.max_bytes:
+            self.remove(next(iter(self.entries)))
+
+    def remove(self, key) -> None:
+        """Drop the entry stored under key"""
+        self.size -= self.entries.pop(key).size
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        self.entries.clear()
+        self.size = 0
@@ -1,8 +1,9 @@
 from enum import Enum, unique
-from dataclasses import dataclass, field
-from typing import Tuple
+from typing import List, Tuple, TYPE_CHECKING
 from pygame import Rect
-from src.style.colors import Colors
+
+if TYPE_CHECKING:
+    from src.data import DataGrid
 
 
 @unique
@@ -16,31 +17,68 @@ class CellValue(Enum):
     WALL = 7
 
 
-@dataclass
+# Map the raw values stored in DataGrid.values back to CellValue members
+CELL_VALUES = {value.value: value for value in CellValue}
+
+# Edge length of a cell in pixels when the grid fits the window at full size
+CELL_SIZE = 20
+
+
 class Cell:
-    # General data
-    x: int = field(repr=True, init=True)
-    y: int = field(repr=True, init=True)
-    pos: Tuple[int, int] = field(repr=False, init=False)
-    value: CellValue = field(repr=True, init=False, default=CellValue.OPEN)
-    start: bool = field(repr=True, init=False, default=False)
-    goal: bool = field(repr=True, init=False, default=False)
-
-    # Visualization
-    size: int = field(repr=False, init=False, default=20)
-    rect: Rect = field(repr=False, init=False, default=None)
-    border: Rect = field(repr=False, init=False, default=None)
-    fill_color: Tuple[int, int, int] = field(repr=False, init=False, default=Colors.OPEN)
-    border_color: Tuple[int, int, int] = field(repr=False, init=False, default=Colors.GRID)
-
-    def __post_init__(self):
-        self.pos = self.x, self.y
-        self.rect = Rect(self.x * self.size,
-                         self.y * self.size,
-                         self.size,
-                         self.size)
-        self.border = Rect(self.rect)
-        self.neighbors = []
+    """View of a single square of a DataGrid
+
+    The state of the cell is stored in the value array of its grid, so value, start and goal are read from
+    and written to the grid. Cells are slotted records of their position and grid, grids with millions of them are
+    common. The rectangles they are drawn in are computed on access, the interface keeps its own geometry.
+    """
+    __slots__ = ("x", "y", "grid", "pos")
+    x: int
+    y: int
+    grid: 'DataGrid'
+    pos: Tuple[int, int]
+
+    def __init__(self, x: int, y: int, grid: 'DataGrid'):
+        self.x = x
+        self.y = y
+        self.grid = grid
+        self.pos = x, y
+
+    def __repr__(self):
+        return f"Cell(x={self.x}, y={self.y}, value={self.value!r}, start={self.start}, goal={self.goal})"
+
+    @property
+    def rect(self) -> Rect:
+        """Square the cell is drawn in at the default cell size, without zoom or pan"""
+        return Rect(self.x * CELL_SIZE, self.y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+
+    @property
+    def border(self) -> Rect:
+        """Outline of the cell, the same square as rect"""
+        return self.rect
+
+    @property
+    def value(self) -> CellValue:
+        """Current value of the cell"""
+        return CELL_VALUES[self.grid.values.item(self.x, self.y)]
+
+    @value.setter
+    def value(self, value: CellValue):
+        self.grid.set_cell_value(self.pos, value)
+
+    @property
+    def start(self) -> bool:
+        """True if the cell is the start of the grid"""
+        return self.pos == self.grid.start_pos
+
+    @property
+    def goal(self) -> bool:
+        """True if the cell is the goal of the grid"""
+        return self.pos == self.grid.goal_pos
+
+    @property
+    def neighbors(self) -> List['Cell']:
+        """Non-blocked neighbors of the cell, looked up in the neighbor graph of the grid"""
+        return [self.grid.cells[x][y] for x, y in self.grid.neighbors(self.pos)]
 
     def set_value(self, value: CellValue) -> bool:
         """Update the cells value (unless it's start/goal)"""
@@ -49,33 +87,5 @@ class Cell:
             return True
         return False
 
-    def update_color(self):
-        """Update color according to current cell value"""
-        if self.value == CellValue.OPEN:
-            self.write_color_to_cell(Colors.OPEN, Colors.GRID)
-
-        elif self.value == CellValue.CONSIDERED:
-            self.write_color_to_cell(Colors.CONSIDERED, Colors.GRID)
-
-        elif self.value == CellValue.CONSIDERING:
-            self.write_color_to_cell(Colors.CONSIDERING, Colors.GRID)
-
-        elif self.value == CellValue.PATH:
-            self.write_color_to_cell(Colors.PATH)
-
-        elif self.value == CellValue.START:
-            self.write_color_to_cell(Colors.START)
-
-        elif self.value == CellValue.GOAL:
-            self.write_color_to_cell(Colors.GOAL)
-
-        elif self.value == CellValue.WALL:
-            self.write_color_to_cell(Colors.WALL)
-
-    def write_color_to_cell(self, fill, border=None):
-        """"""
-        self.fill_color = fill
-        self.border_color = fill if border is None else border
-
     def __lt__(self, other):
         return False
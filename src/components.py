@@ -0,0 +1,140 @@
+"""Connected components of the open cells of a grid, to reject queries between disconnected cells without a search
+
+The components are labeled in one vectorized pass. Every cell holds a label (-1 for walls), labels that were merged
+since are joined in a union-find forest. Opening a cell merges the components around it. A new wall can split its
+component, unless its former neighbors are still connected around it; otherwise the components are labeled again
+the next time they are needed.
+"""
+from typing import Dict, List, Tuple
+import numpy as np
+from src.cell import CellValue
+from src.graph import DIRECTIONS, DIAGONALS, NeighborGraph
+
+# Label of walls
+WALL_LABEL = -1
+# Labels are 32 bit integers on grids small enough to leave room for the labels of cells opened later
+MAX_SMALL_SIZE = 2 ** 30
+# Moves that reach every pair of neighbors once, moves are symmetric. Moves down are handled by the runs
+FORWARD_MOVES = tuple((bit, dx, dy) for bit, dx, dy in DIRECTIONS + DIAGONALS if dx == 1)
+
+
+def label_type(size: int) -> type:
+    """Return the integer type of the labels of a grid of size cells"""
+    return np.int32 if size <= MAX_SMALL_SIZE else np.int64
+
+
+def label_components(values: np.ndarray, mask: np.ndarray, connectivity: int = 4) -> np.ndarray:
+    """Return the label of the component of every cell, below the number of cells, and WALL_LABEL for walls
+
+    Vertical runs of open cells are connected, so the runs are numbered up front and the components are labeled
+    by the number of one of their runs. The moves between neighboring columns hook the larger of the two runs
+    they connect onto the smaller one, and pointer jumping flattens the trees, until no move connects two trees.
+    """
+    cols, rows = values.shape
+    passable = values != CellValue.WALL.value
+    starts = passable & ~np.pad(passable, ((0, 0), (1, 0)))[:, :-1]
+    # Walls get the number of the run above them, or -1
+    runs = np.cumsum(starts, axis=None, dtype=label_type(values.size)).reshape(cols, rows) - 1
+
+    # Moves between runs, of a stretch of moves between the same two runs only the first one is kept
+    sources, targets = [], []
+    for bit, dx, dy in FORWARD_MOVES if connectivity == 8 else FORWARD_MOVES[:1]:
+        begin = (slice(0, cols - 1), slice(max(-dy, 0), rows - max(dy, 0)))
+        end = (slice(1, cols), slice(max(dy, 0), rows + min(dy, 0)))
+        allowed = passable[begin] & (mask[begin] & bit != 0)
+        source, target = runs[begin], runs[end]
+        kept = allowed.copy()
+        kept[:, 1:] &= ~(allowed[:, :-1] & (source[:, 1:] == source[:, :-1]) & (target[:, 1:] == target[:, :-1]))
+        sources.append(source[kept])
+        targets.append(target[kept])
+    sources, targets = np.concatenate(sources), np.concatenate(targets)
+
+    # Run every run is hooked onto, roots point to themselves
+    parents = np.arange(int(starts.sum()), dtype=runs.dtype)
+    while sources.size:
+        low, high = np.minimum(sources, targets), np.maximum(sources, targets)
+        # Any of the runs offered wins, they are all smaller than the root they are hooked onto
+        parents[high] = low
+        while True:
+            jumped = parents[parents]
+            if np.array_equal(jumped, parents):
+                break
+            parents = jumped
+        sources, targets = parents[sources], parents[targets]
+        keep = sources != targets
+        sources, targets = sources[keep], targets[keep]
+    return np.where(passable, parents[np.maximum(runs, 0)] if parents.size else runs, WALL_LABEL)
+
+
+class Components:
+    """Component labels of the open cells of a grid, kept up to date while single walls change"""
+    graph: NeighborGraph
+    # Label of every cell, indexed like the values
+    labels: np.ndarray
+    # Parent of every label that was merged into another one
+    parents: Dict[int, int]
+    # Label given to the next cell that is opened, above all flat indices
+    next_label: int
+
+    def __init__(self, values: np.ndarray, graph: NeighborGraph):
+        self.graph = graph
+        self.labels = label_components(values, graph.mask, graph.connectivity)
+        self.parents = {}
+        self.next_label = values.size
+
+    def find(self, label: int) -> int:
+        """Return the label label was merged into, compressing the path to it"""
+        root = label
+        while root in self.parents:
+            root = self.parents[root]
+        while label != root:
+            self.parents[label], label = root, self.parents[label]
+        return root
+
+    def component(self, pos: Tuple[int, int]) -> int:
+        """Return the label of the component of the cell at pos, WALL_LABEL for walls"""
+        label = self.labels.item(pos)
+        return label if label == WALL_LABEL else self.find(label)
+
+    def connected(self, a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+        """Return True if a path leads from the cell at a to the cell at b"""
+        label = self.component(a)
+        return label != WALL_LABEL and label == self.component(b)
+
+    def cleared(self, pos: Tuple[int, int]) -> bool:
+        """Merge the components around the cell at pos after it was opened
+
+        Returns False if the labels ran out, they have to be computed again then.
+        """
+        label = self.next_label
+        if label > np.iinfo(self.labels.dtype).max:
+            return False
+        self.next_label += 1
+        self.labels[pos] = label
+        # Diagonal moves allowed by the opening connect neighbors of pos, which are all merged here
+        for neighbor in self.graph.neighbors(pos):
+            root = self.component(neighbor)
+            if root != label:
+                self.parents[root] = label
+        return True
+
+    def walled(self, pos: Tuple[int, int]) -> bool:
+        """Remove the cell at pos from its component after it became a wall
+
+        Returns False if the component may have been split, the labels are outdated then. The moves that the wall
+        blocks all start and end next to it, so the component stays whole if the former neighbors of pos (which are
+        still the cells the mask of pos points to) are connected within the 3x3 neighborhood of pos.
+        """
+        self.labels[pos] = WALL_LABEL
+        neighbors = self.graph.neighbors(pos)
+        if len(neighbors) <= 1:
+            return True
+        x, y = pos
+        reached: List[Tuple[int, int]] = [neighbors[0]]
+        seen = {neighbors[0], pos}
+        for cell in reached:
+            for neighbor in self.graph.neighbors(cell):
+                if neighbor not in seen and abs(neighbor[0] - x) <= 1 and abs(neighbor[1] - y) <= 1:
+                    seen.add(neighbor)
+                    reached.append(neighbor)
+        return seen.issuperset(neighbors)
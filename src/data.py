@@ -1,15 +1,106 @@
 from dataclasses import dataclass, field
-from typing import List, Tuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union, TYPE_CHECKING
+import numpy as np
 from src.cell import Cell, CellValue
+from src.components import Components
+from src.graph import CornerCutting, NeighborGraph, SQRT2
+from src.workspace import Workspace
+
+if TYPE_CHECKING:
+    from src.algorithms.algorithm import Algorithm
+    from src.trace import TraceRecorder
+
+# Edge length of the square regions whose wall changes are versioned separately
+REGION_SIZE = 32
+# Most cells a compact grid keeps around, all of them are dropped once there are more
+MAX_VIEWS = 2 ** 16
+
+
+def unit_costs(cols: int, rows: int) -> np.ndarray:
+    """Return a read-only cost layer of cols x rows cells that all cost 1, without storing a cost per cell
+
+    Grids using it copy it into a writable array the first time a cost is set.
+    """
+    return np.broadcast_to(np.float32(1), (cols, rows))
+
+
+class LazyCells:
+    """Cell container for compact grids that creates each Cell on first access
+
+    Supports the same cells[x][y] indexing and column-wise iteration as List[List[Cell]]. Up to MAX_VIEWS cells are
+    kept for repeated accesses, after that the next access may create a new cell for the same position. Cells hold
+    no state of their own, so they are compared by pos rather than by identity.
+    """
+
+    def __init__(self, grid: 'DataGrid'):
+        self.grid = grid
+        self.views: Dict[Tuple[int, int], Cell] = {}
+
+    def __len__(self) -> int:
+        return self.grid.cols
+
+    def __getitem__(self, x: int) -> 'LazyColumn':
+        if not 0 <= x < self.grid.cols:
+            raise IndexError("column index out of range")
+        return LazyColumn(self, x)
+
+    def __iter__(self) -> Iterator['LazyColumn']:
+        for x in range(self.grid.cols):
+            yield LazyColumn(self, x)
+
+    def get(self, x: int, y: int) -> Cell:
+        """Return the cell at (x, y), creating it if it doesn't exist yet"""
+        cell = self.views.get((x, y))
+        if cell is None:
+            if len(self.views) >= MAX_VIEWS:
+                self.views.clear()
+            cell = self.views[(x, y)] = Cell(x, y, self.grid)
+        return cell
+
+
+class LazyColumn:
+    """Single column of a LazyCells container"""
+
+    def __init__(self, cells: LazyCells, x: int):
+        self.cells = cells
+        self.x = x
+
+    def __len__(self) -> int:
+        return self.cells.grid.rows
+
+    def __getitem__(self, y: int) -> Cell:
+        if not 0 <= y < self.cells.grid.rows:
+            raise IndexError("row index out of range")
+        return self.cells.get(self.x, y)
+
+    def __iter__(self) -> Iterator[Cell]:
+        for y in range(self.cells.grid.rows):
+            yield self.cells.get(self.x, y)
 
 
 @dataclass
 class DataGrid:
-    """Class for keeping track of individual cells"""
-    cells: List[List[Cell]] = field(repr=False, init=False, default=None)
+    """Class for keeping track of individual cells
+
+    The state of every cell is stored in a single uint8 array indexed as values[x, y], the cost of entering it in
+    a float32 array of the same shape. In compact mode the Cell objects are only created when they are accessed,
+    otherwise all of them are created up front.
+    """
+    cells: Union[List[List[Cell]], LazyCells] = field(repr=False, init=False, default=None)
+    values: np.ndarray = field(repr=False, init=False, default=None)
+    # Cost of entering every cell, indexed like values
+    costs: np.ndarray = field(repr=False, init=False, default=None)
+    # Lowest entry of costs, scales the heuristics so they stay admissible
+    min_cost: float = field(repr=False, init=False, default=1.0)
+    graph: NeighborGraph = field(repr=False, init=False, default=None)
 
     rows: int = field(repr=True, init=True, default=30)
     cols: int = field(repr=True, init=True, default=30)
+    compact: bool = field(repr=True, init=True, default=False)
+    # 4 to move along the axes only, 8 to move diagonally as well
+    connectivity: int = field(repr=True, init=True, default=4)
+    # Rule for diagonal moves next to walls on 8-connected grids
+    corner_cutting: CornerCutting = field(repr=False, init=True, default=CornerCutting.NEVER)
 
     x_min: int = field(repr=False, init=False, default=0)
     x_max: int = field(repr=False, init=False)
@@ -20,15 +111,29 @@ class DataGrid:
     start_pos: Tuple[int, int] = field(repr=True, init=False)
     goal_pos:  Tuple[int, int] = field(repr=True, init=False)
 
+    # Positions of the cells changed since the frontend last drew them (None while changes aren't tracked)
+    changes: Optional[Set[Tuple[int, int]]] = field(repr=False, init=False, default=None)
+    # True if all cells changed since the frontend last drew them
+    changed_all: bool = field(repr=False, init=False, default=False)
+    # Recorder of all value changes while a search is traced
+    trace: Optional['TraceRecorder'] = field(repr=False, init=False, default=None)
+    # Connected components of the open cells, computed when they are needed (None until then or once outdated)
+    components: Optional[Components] = field(repr=False, init=False, default=None)
+    # Scratch arrays of the searches on the grid, reused by the next search once one is done
+    workspaces: List[Workspace] = field(repr=False, init=False, default_factory=list)
+
+    # Incremented whenever a wall or a cost is changed
+    version: int = field(repr=False, init=False, default=0)
+    # Incremented whenever a wall is removed or a cost is lowered, which can make any path shorter
+    cleared_version: int = field(repr=False, init=False, default=0)
+    # Number of wall and cost changes in every REGION_SIZE x REGION_SIZE region, indexed like values
+    region_versions: np.ndarray = field(repr=False, init=False, default=None)
+
     def __post_init__(self) -> None:
         """This code is executed at the end of the automatically generated __init__"""
         # Create cells and assign them to the grid
         self.create_cells()
 
-        # Set grid bounds
-        self.x_max = self.cols - 1
-        self.y_max = self.rows - 1
-
         # Set start and goal position
         self.start_pos = (2, 2)
         self.goal_pos = (self.cols - 3, self.rows - 3)
@@ -36,45 +141,218 @@ class DataGrid:
         self.set_goal(self.goal_pos)
 
     def create_cells(self) -> None:
-        """Create a data cell on the 2D grid for each square"""
-        self.cells = []
-        for col in range(self.cols):
-            self.cells.append([])
-            for row in range(self.rows):
-                self.cells[col].append(Cell(col, row))
+        """Create the value array and a data cell on the 2D grid for each square"""
+        values = np.full((self.cols, self.rows), CellValue.OPEN.value, dtype=np.uint8)
+        self.use_arrays(values, np.ones((self.cols, self.rows), dtype=np.float32), 1.0)
+
+    def use_arrays(self, values: np.ndarray, costs: np.ndarray, min_cost: Optional[float] = None,
+                   mask: Optional[np.ndarray] = None) -> None:
+        """Make the grid work on existing value and cost arrays, e.g. ones memory mapped from a grid file
+
+        The size of the grid follows the arrays, start_pos and goal_pos are left to the caller. min_cost is
+        computed from costs unless it is given, the neighbor masks from values unless mask holds them.
+        """
+        if values.shape != costs.shape:
+            raise ValueError(f"Value and cost arrays differ in shape: {values.shape} and {costs.shape}")
+        if mask is not None and mask.shape != values.shape:
+            raise ValueError(f"Value and mask arrays differ in shape: {values.shape} and {mask.shape}")
+        self.cols, self.rows = values.shape
+        self.x_max = self.cols - 1
+        self.y_max = self.rows - 1
+        self.values = values
+        self.costs = costs
+        self.min_cost = float(costs.min()) if min_cost is None else min_cost
+        self.graph = NeighborGraph(self.values, self.connectivity, self.corner_cutting, mask)
+        regions = ((self.cols + REGION_SIZE - 1) // REGION_SIZE, (self.rows + REGION_SIZE - 1) // REGION_SIZE)
+        self.region_versions = np.zeros(regions, dtype=np.int64)
+        self.workspaces = []
+        self.components = None
+        if self.compact:
+            self.cells = LazyCells(self)
+            return
+        self.cells = [[Cell(col, row, self) for row in range(self.rows)] for col in range(self.cols)]
+
+    def copy_arrays(self) -> None:
+        """Replace the arrays mapped from a file by copies in memory, which lets go of the file"""
+        if isinstance(self.values, np.memmap):
+            self.values = self.graph.values = np.array(self.values)
+        if isinstance(self.graph.mask, np.memmap):
+            self.graph.mask = np.array(self.graph.mask)
+        if isinstance(self.costs, np.memmap):
+            self.costs = np.array(self.costs)
+
+    def claim_workspace(self, owner: 'Algorithm') -> Workspace:
+        """Return a workspace no unfinished search is using, claimed for owner, creating one if all are in use"""
+        workspace = next((workspace for workspace in self.workspaces if workspace.is_free()), None)
+        if workspace is None:
+            workspace = Workspace(self.cols, self.rows)
+            self.workspaces.append(workspace)
+        workspace.claim(owner)
+        return workspace
+
+    def set_cell_value(self, pos: (int, int), value: CellValue) -> None:
+        """Write the value of the cell at pos and patch the neighbor graph if a wall was added or removed"""
+        old = self.values.item(pos)
+        was_wall = old == CellValue.WALL.value
+        self.values[pos] = value.value
+        if was_wall != (value is CellValue.WALL):
+            self.wall_changed(pos, was_wall)
+        if self.changes is not None:
+            self.changes.add(pos)
+        if self.trace is not None:
+            self.trace.record(pos, old, value.value)
+
+    def wall_changed(self, pos: (int, int), cleared: bool) -> None:
+        """Update the neighbor graph, components and versions after the cell at pos became a wall or was cleared"""
+        self.graph.update(pos)
+        if self.components is not None:
+            if not (self.components.cleared(pos) if cleared else self.components.walled(pos)):
+                self.components = None
+        self.region_changed(pos, cleared)
+
+    def region_changed(self, pos: (int, int), cleared: bool) -> None:
+        """Update the versions after the cell at pos became harder to pass (or easier if cleared)"""
+        self.version += 1
+        self.region_versions[pos[0] // REGION_SIZE, pos[1] // REGION_SIZE] += 1
+        if cleared:
+            self.cleared_version += 1
+
+    def walls_replaced(self) -> None:
+        """Rebuild the neighbor graph and update all versions after any number of walls changed at once"""
+        self.graph.rebuild()
+        self.components = None
+        self.all_regions_changed()
+
+    def all_regions_changed(self) -> None:
+        """Update all versions after any number of cells changed at once"""
+        self.version += 1
+        self.region_versions += 1
+        self.cleared_version += 1
+
+    def set_cost(self, pos: (int, int), cost: float) -> None:
+        """Set the cost of entering the cell at pos"""
+        if not cost > 0:
+            raise ValueError(f"Cell costs must be positive, got {cost}")
+        old = self.costs.item(pos)
+        # Compared as stored, so setting the cost a cell already has doesn't copy a shared cost layer
+        cost = self.costs.dtype.type(cost).item()
+        if cost == old:
+            return
+        self.writable_costs()[pos] = cost
+        if cost < self.min_cost:
+            self.min_cost = cost
+        elif old == self.min_cost:
+            self.min_cost = float(self.costs.min())
+        self.region_changed(pos, cost < old)
+        if self.changes is not None:
+            self.changes.add(pos)
+
+    def writable_costs(self) -> np.ndarray:
+        """Return the costs, copied first if they are a read-only layer such as the one of unit_costs"""
+        if not self.costs.flags.writeable:
+            self.costs = np.array(self.costs)
+        return self.costs
+
+    def set_costs(self, costs: np.ndarray) -> None:
+        """Replace the costs of all cells by the array costs, indexed like values"""
+        costs = np.asarray(costs, dtype=np.float32)
+        if costs.shape != self.costs.shape:
+            raise ValueError(f"Expected a cost array of shape {self.costs.shape}, got {costs.shape}")
+        if not (costs > 0).all():
+            raise ValueError("Cell costs must be positive")
+        self.writable_costs()[:] = costs
+        self.min_cost = float(self.costs.min())
+        self.all_regions_changed()
+        self.changed_all = True
+
+    def load_costs(self, path: str) -> None:
+        """Load the costs of all cells from a .npy file or a text file of whitespace separated numbers
+
+        Both hold one row of the grid per line (shape rows x cols), as the grid appears on the screen.
+        """
+        if path.endswith(".npy"):
+            costs = np.load(path)
+        else:
+            costs = np.loadtxt(path, dtype=np.float32, ndmin=2)
+        self.set_costs(np.asarray(costs).T)
+
+    def path_cost(self, path: List[Tuple[int, int]]) -> float:
+        """Return the summed cost of entering every cell of path after the first one
+
+        Diagonal steps cost SQRT2 times the cost of the cell they enter.
+        """
+        if not path:
+            return float("inf")
+        positions = np.array(path, dtype=np.intp).reshape(-1, 2)
+        diagonal = (positions[1:] != positions[:-1]).all(axis=1)
+        costs = self.costs[positions[1:, 0], positions[1:, 1]].astype(np.float64)
+        return float((costs * np.where(diagonal, SQRT2, 1.0)).sum())
+
+    def set_connectivity(self, connectivity: int, corner_cutting: Optional[CornerCutting] = None) -> None:
+        """Switch between 4- and 8-connected movement and optionally change the corner cutting rule"""
+        self.graph = NeighborGraph(self.values, connectivity, corner_cutting or self.corner_cutting)
+        self.connectivity = connectivity
+        self.corner_cutting = self.graph.corner_cutting
+        self.components = None
+        self.all_regions_changed()
+
+    def track_changes(self) -> None:
+        """Start recording the positions of changed cells in changes"""
+        self.changes = set()
+        self.changed_all = True
+
+    def clear_changes(self) -> None:
+        """Forget the recorded changes once they were drawn"""
+        self.changes.clear()
+        self.changed_all = False
+
+    def set_walls(self, walls: np.ndarray) -> None:
+        """Replace all walls by the cells marked in the boolean array walls, keeping start and goal open"""
+        self.values[self.values == CellValue.WALL.value] = CellValue.OPEN.value
+        endpoints = np.isin(self.values, (CellValue.START.value, CellValue.GOAL.value))
+        self.values[walls & ~endpoints] = CellValue.WALL.value
+        self.walls_replaced()
+        self.changed_all = True
+
+    def neighbors(self, pos: (int, int)) -> List[Tuple[int, int]]:
+        """Return the positions of the non-blocked neighbors of pos"""
+        return self.graph.neighbors(pos)
 
     def set_start(self, pos: (int, int)) -> bool:
         """Set start_pos if pos is in the grid"""
         if self.pos_in_grid(pos):
             self.start_pos = pos
-            x, y = pos
-            self.cells[x][y].value = CellValue.START
-            self.cells[x][y].start = True
+            self.set_cell_value(pos, CellValue.START)
             return True
         return False
 
     def remove_start(self):
-        x, y = self.start_pos
-        self.cells[x][y].value = CellValue.OPEN
-        self.cells[x][y].start = False
+        self.set_cell_value(self.start_pos, CellValue.OPEN)
         self.start_pos = (-10, -10)
 
     def set_goal(self, pos: (int, int)) -> bool:
         """Set goal_pos if pos is in the grid"""
         if self.pos_in_grid(pos):
             self.goal_pos = pos
-            x, y = pos
-            self.cells[x][y].value = CellValue.GOAL
-            self.cells[x][y].goal = True
+            self.set_cell_value(pos, CellValue.GOAL)
             return True
         return False
 
     def remove_goal(self):
-        x, y = self.goal_pos
-        self.cells[x][y].value = CellValue.OPEN
-        self.cells[x][y].goal = False
+        self.set_cell_value(self.goal_pos, CellValue.OPEN)
         self.goal_pos = (-10, -10)
 
+    def is_reachable(self, start: (int, int), goal: (int, int)) -> bool:
+        """Return True if a path leads from start to goal, i.e. both are open cells of the same component
+
+        The components are labeled on the first call after they were outdated, the later calls take constant time.
+        """
+        if not self.pos_in_grid(start) or not self.pos_in_grid(goal):
+            return False
+        if self.components is None:
+            self.components = Components(self.values, self.graph)
+        return self.components.connected(start, goal)
+
     def pos_in_grid(self, coords: (int, int)) -> bool:
         """Return True if coords are in the grid"""
         x, y = coords
@@ -85,18 +363,19 @@ class DataGrid:
 
     def reset(self):
         """Reset open cells to initial state"""
-        for col in self.cells:
-            for cell in col:
-                if not (cell.value == CellValue.WALL
-                        or cell.value == CellValue.START
-                        or cell.value == CellValue.GOAL):
-                    cell.value = CellValue.OPEN
+        keep = np.isin(self.values, (CellValue.WALL.value, CellValue.START.value, CellValue.GOAL.value))
+        self.values[~keep] = CellValue.OPEN.value
+        self.changed_all = True
 
     def reset_all(self):
         """Reset all cells to initial state"""
-        for col in self.cells:
-            for cell in col:
-                cell.value = CellValue.OPEN
+        self.values.fill(CellValue.OPEN.value)
+        # A read-only cost layer is the shared one of unit costs
+        if self.costs.flags.writeable:
+            self.costs.fill(1)
+        self.min_cost = 1.0
+        self.walls_replaced()
+        self.changed_all = True
         start_pos = (2, 2)
         goal_pos = (self.cols - 3, self.rows - 3)
         self.set_start(start_pos)
@@ -0,0 +1,136 @@
+"""Distance fields: the cost of reaching one source cell from every cell of a grid"""
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import List, Optional, Tuple
+import numpy as np
+from src.data import DataGrid
+from src.graph import DIAGONALS, DIRECTIONS, SQRT2
+from src.solver import SolveResult
+
+# (dx, dy) of the moves the next hops index into
+STEPS = [(dx, dy) for _, dx, dy in DIRECTIONS + DIAGONALS]
+
+
+@dataclass
+class DistanceField:
+    """Cost of the cheapest path from every cell to the source and the first move on it"""
+    source: Tuple[int, int]
+    # Costs indexed like the values of the grid (inf if the source can't be reached)
+    dist: np.ndarray = field(repr=False)
+    # Index into STEPS of the first move towards the source (-1 at the source and where it can't be reached)
+    next_hop: np.ndarray = field(repr=False)
+    # Grid version the field was computed for
+    version: int
+
+    @property
+    def size(self) -> int:
+        """Memory of the arrays in bytes"""
+        return self.dist.nbytes + self.next_hop.nbytes
+
+    def cost(self, start: Tuple[int, int]) -> float:
+        """Return the cost of the cheapest path from start to the source"""
+        return self.dist.item(start)
+
+    def path(self, start: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Follow the next hops from start to the source and return the positions (empty if there is no path)"""
+        if self.dist.item(start) == np.inf:
+            return []
+        x, y = start
+        path = [start]
+        while (x, y) != self.source:
+            dx, dy = STEPS[self.next_hop.item(x, y)]
+            x += dx
+            y += dy
+            path.append((x, y))
+        return path
+
+
+def distance_field(grid: DataGrid, source: Tuple[int, int]) -> DistanceField:
+    """Compute the distance field of source over the whole grid
+
+    The wavefront is expanded in bands of costs as wide as the cheapest move, all cells of a band in every
+    direction at once on flat index arrays. No move can lower the cost of a cell in the band it starts in, so every
+    cell is expanded exactly once. With unit costs the bands are the levels of a breadth first search.
+    """
+    cols, rows = grid.cols, grid.rows
+    mask = grid.graph.mask.ravel()
+    costs = grid.costs.ravel().astype(np.float64)
+    dist = np.full(cols * rows, np.inf)
+    next_hop = np.full(cols * rows, -1, dtype=np.int8)
+
+    bits = {(dx, dy): bit for bit, dx, dy in DIRECTIONS + DIAGONALS}
+    moves = []
+    # The first four steps move along the axes
+    for index, (dx, dy) in enumerate(STEPS[:grid.connectivity]):
+        # Moves are symmetric: a cell can move to the wavefront if the wavefront can move back to it
+        moves.append((index, bits[(-dx, -dy)], dx * rows + dy, SQRT2 if dx and dy else 1.0))
+
+    start = source[0] * rows + source[1]
+    dist[start] = 0
+    # Cells whose cost dropped since they were last expanded
+    pending = np.array([start])
+    while pending.size:
+        pending_dist = dist[pending]
+        in_band = pending_dist < pending_dist.min() + grid.min_cost
+        front = pending[in_band]
+        reached = [pending[~in_band]]
+        for index, opposite, offset, length in moves:
+            front_cells = front[(mask[front] & opposite) != 0]
+            cells = front_cells - offset
+            # Entering the wavefront cell is what the move costs
+            candidate = dist[front_cells] + length * costs[front_cells]
+            better = candidate < dist[cells]
+            cells = cells[better]
+            dist[cells] = candidate[better]
+            next_hop[cells] = index
+            reached.append(cells)
+        pending = np.unique(np.concatenate(reached))
+    return DistanceField(source, dist.reshape(cols, rows), next_hop.reshape(cols, rows), grid.version)
+
+
+class FieldCache:
+    """Distance fields of one grid, reused until a wall or cost of the grid changes
+
+    Fields are kept in LRU order up to max_bytes, as every one of them takes 9 bytes per cell.
+    """
+    grid: DataGrid
+    max_bytes: int
+    fields: 'OrderedDict[Tuple[int, int], DistanceField]'
+    size: int
+
+    def __init__(self, grid: DataGrid, max_bytes: int = 256 * 2 ** 20):
+        self.grid = grid
+        self.max_bytes = max_bytes
+        self.fields = OrderedDict()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+    def get(self, source: Tuple[int, int]) -> DistanceField:
+        """Return the distance field of source, computing it if there is no current one"""
+        current = self.fields.get(source)
+        if current is not None:
+            if current.version == self.grid.version:
+                self.fields.move_to_end(source)
+                return current
+            self.size -= self.fields.pop(source).size
+        current = distance_field(self.grid, source)
+        self.fields[source] = current
+        self.size += current.size
+        while self.size > self.max_bytes and len(self.fields) > 1:
+            self.size -= self.fields.pop(next(iter(self.fields))).size
+        return current
+
+    def solve(self, start: Optional[Tuple[int, int]] = None, goal: Optional[Tuple[int, int]] = None) -> SolveResult:
+        """Return the cheapest path from start to goal from the distance field of goal
+
+        start and goal default to the start and goal of the grid. The result reports 0 expanded cells.
+        """
+        begin = perf_counter()
+        start = self.grid.start_pos if start is None else start
+        goal = self.grid.goal_pos if goal is None else goal
+        distance = self.get(goal)
+        path = distance.path(start)
+        return SolveResult(path, distance.cost(start), 0, perf_counter() - begin)
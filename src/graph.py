@@ -0,0 +1,164 @@
+from enum import Enum, unique
+from math import sqrt
+from typing import List, Optional, Tuple
+import numpy as np
+from src.cell import CellValue
+
+# Bits of the neighbor mask, one for every direction a cell can be left in
+LEFT = 1
+RIGHT = 2
+UP = 4
+DOWN = 8
+UP_LEFT = 16
+UP_RIGHT = 32
+DOWN_LEFT = 64
+DOWN_RIGHT = 128
+
+# (bit, dx, dy) for every direction, in the order neighbors are returned
+DIRECTIONS = ((LEFT, -1, 0), (RIGHT, 1, 0), (UP, 0, -1), (DOWN, 0, 1))
+DIAGONALS = ((UP_LEFT, -1, -1), (UP_RIGHT, 1, -1), (DOWN_LEFT, -1, 1), (DOWN_RIGHT, 1, 1))
+
+# Offsets of the open neighbors for every possible mask
+OFFSETS = [[(dx, dy) for bit, dx, dy in DIRECTIONS + DIAGONALS if bits & bit] for bits in range(256)]
+
+# Length of a diagonal step
+SQRT2 = sqrt(2)
+# Most cells whose masks are computed at once, which bounds the temporary arrays of building the masks
+CHUNK_CELLS = 2 ** 20
+
+
+@unique
+class CornerCutting(Enum):
+    """Rules for diagonal moves past the walls at their sides on 8-connected grids"""
+    # Diagonal moves only need the target cell to be open
+    ALWAYS = 1
+    # Diagonal moves may pass one wall at their side, but can't squeeze between two
+    ONE_WALL = 2
+    # Diagonal moves need both cells at their side to be open
+    NEVER = 3
+
+
+def shifted(passable: np.ndarray, dx: int, dy: int) -> np.ndarray:
+    """Return a boolean array holding passable[x + dx, y + dy] at [x, y], False outside the grid"""
+    cols, rows = passable.shape
+    result = np.zeros_like(passable)
+    result[max(-dx, 0):cols - max(dx, 0), max(-dy, 0):rows - max(dy, 0)] = \
+        passable[max(dx, 0):cols + min(dx, 0), max(dy, 0):rows + min(dy, 0)]
+    return result
+
+
+def build_neighbor_mask(values: np.ndarray, connectivity: int = 4,
+                        corner_cutting: CornerCutting = CornerCutting.NEVER) -> np.ndarray:
+    """Return a uint8 array holding the direction bits of the open neighbors of every cell"""
+    passable = values != CellValue.WALL.value
+    mask = np.zeros(values.shape, dtype=np.uint8)
+    for bit, dx, dy in DIRECTIONS:
+        mask |= shifted(passable, dx, dy) * np.uint8(bit)
+    if connectivity == 8:
+        for bit, dx, dy in DIAGONALS:
+            allowed = shifted(passable, dx, dy)
+            if corner_cutting is CornerCutting.ONE_WALL:
+                allowed &= shifted(passable, dx, 0) | shifted(passable, 0, dy)
+            elif corner_cutting is CornerCutting.NEVER:
+                allowed &= shifted(passable, dx, 0) & shifted(passable, 0, dy)
+            mask |= allowed * np.uint8(bit)
+    return mask
+
+
+class NeighborGraph:
+    """Neighbor masks of all cells of a grid, patched locally when walls change"""
+    values: np.ndarray
+    mask: np.ndarray
+    # 4 or 8 neighbors per cell
+    connectivity: int
+    corner_cutting: CornerCutting
+
+    def __init__(self, values: np.ndarray, connectivity: int = 4,
+                 corner_cutting: CornerCutting = CornerCutting.NEVER, mask: Optional[np.ndarray] = None):
+        """Set up the graph of values, whose masks are computed unless mask holds them, e.g. from a grid file"""
+        if connectivity not in (4, 8):
+            raise ValueError(f"Connectivity must be 4 or 8, got {connectivity}")
+        self.values = values
+        self.connectivity = connectivity
+        self.corner_cutting = corner_cutting
+        if mask is not None:
+            self.mask = mask
+            return
+        self.mask = np.empty(values.shape, dtype=np.uint8)
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """Recompute the masks of the whole grid, a block of columns at a time"""
+        cols, rows = self.values.shape
+        step = max(CHUNK_CELLS // max(rows, 1), 1)
+        for x0 in range(0, cols, step):
+            x1 = min(x0 + step, cols)
+            # The window of the block includes the neighboring columns
+            wx0, wx1 = max(x0 - 1, 0), min(x1 + 1, cols)
+            window = build_neighbor_mask(self.values[wx0:wx1], self.connectivity, self.corner_cutting)
+            self.mask[x0:x1] = window[x0 - wx0:x1 - wx0]
+
+    def update(self, pos: Tuple[int, int]) -> None:
+        """Recompute the masks of the 3x3 neighborhood around pos after it became a wall or was cleared
+
+        The cell at pos is the target or a side cell only of moves starting in this neighborhood.
+        """
+        x, y = pos
+        cols, rows = self.values.shape
+        # Region to patch...
+        x0, x1 = max(x - 1, 0), min(x + 2, cols)
+        y0, y1 = max(y - 1, 0), min(y + 2, rows)
+        # ...and the window around it that contains all of its neighbors
+        wx0, wx1 = max(x0 - 1, 0), min(x1 + 1, cols)
+        wy0, wy1 = max(y0 - 1, 0), min(y1 + 1, rows)
+        window = build_neighbor_mask(self.values[wx0:wx1, wy0:wy1], self.connectivity, self.corner_cutting)
+        self.mask[x0:x1, y0:y1] = window[x0 - wx0:x1 - wx0, y0 - wy0:y1 - wy0]
+
+    def neighbors(self, pos: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Return the positions of the non-blocked neighbors of pos"""
+        x, y = pos
+        return [(x + dx, y + dy) for dx, dy in OFFSETS[self.mask.item(x, y)]]
+
+
+def relax(dist: np.ndarray, mask: np.ndarray, costs: np.ndarray, connectivity: int = 4,
+          reverse: bool = False) -> np.ndarray:
+    """Lower the entries of dist to the costs of the cheapest paths and return it
+
+    dist holds the initial costs of the cells indexed like mask, with any number of leading axes for independent
+    searches (0 at the sources, inf elsewhere). Every sweep moves all searches one step further in every direction
+    at once, until no cost drops anymore. The costs are those of reaching every cell from a source, or of reaching
+    a source from every cell if reverse. Moves leaving the area of mask aren't considered.
+    """
+    cols, rows = mask.shape
+    moves = []
+    for bit, dx, dy in DIRECTIONS + (DIAGONALS if connectivity == 8 else ()):
+        # Cells the move starts in and the cells it ends in
+        begin = (slice(max(-dx, 0), cols - max(dx, 0)), slice(max(-dy, 0), rows - max(dy, 0)))
+        end = (slice(max(dx, 0), cols + min(dx, 0)), slice(max(dy, 0), rows + min(dy, 0)))
+        # Moves are symmetric, so the reverse move from end to begin costs as much as entering begin
+        weight = costs[begin if reverse else end] * (SQRT2 if dx and dy else 1.0)
+        weight = np.where(mask[begin] & bit, weight, np.inf).astype(dist.dtype)
+        moves.append(((Ellipsis,) + begin, (Ellipsis,) + end, weight))
+    changed = True
+    while changed:
+        changed = False
+        for begin, end, weight in moves:
+            candidate = dist[begin] + weight
+            target = dist[end]
+            better = candidate < target
+            if better.any():
+                np.copyto(target, candidate, where=better)
+                changed = True
+    return dist
+
+
+def distance(p1: Tuple[int, int], p2: Tuple[int, int], connectivity: int = 4) -> float:
+    """Return the length of the shortest move sequence between two positions on a grid without walls
+
+    This is the Manhattan distance on 4-connected grids and the octile distance on 8-connected ones.
+    """
+    dx = abs(p1[0] - p2[0])
+    dy = abs(p1[1] - p2[1])
+    if connectivity == 8:
+        return max(dx, dy) + (SQRT2 - 1) * min(dx, dy)
+    return dx + dy
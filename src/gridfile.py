@@ -0,0 +1,155 @@
+"""Saving and loading grids in a compact binary format, and importing MovingAI benchmark maps
+
+A grid file starts with a HEADER_SIZE byte header, followed by the cell values (one byte per cell, laid out like
+DataGrid.values), the neighbor masks (laid out the same way) and, unless all costs are 1, the costs (float32). Files
+of format version 1 have no masks. Loading maps the arrays into memory instead of reading them: pages are only read
+when they are touched, and processes loading the same file share them until they write to them.
+"""
+import os
+import struct
+from typing import Optional, Tuple
+import numpy as np
+from src.cell import CellValue
+from src.data import DataGrid, unit_costs
+from src.graph import CornerCutting
+
+MAGIC = b"PFGRID"
+FORMAT_VERSION = 2
+SUFFIX = ".grid"
+# magic, format version, flags, cols, rows, start x, y, goal x, y, connectivity, corner cutting, min cost
+HEADER = struct.Struct("<6sHIIIiiiiBBxxd")
+# The arrays start at this offset, which keeps them aligned
+HEADER_SIZE = 64
+# Flag set if the file holds a cost layer
+HAS_COSTS = 1
+# Flag set if the file holds the neighbor masks
+HAS_MASK = 2
+
+# Characters of MovingAI maps that can be entered, all others are walls
+# (https://movingai.com/benchmarks/formats.html)
+MOVINGAI_PASSABLE = b".GS"
+
+
+def save_grid(grid: DataGrid, path: str) -> None:
+    """Write the walls, start, goal, connectivity and costs of grid to path
+
+    The cells marked by a search are saved as open cells. The file is written next to path and moved over it. A
+    grid mapped from path itself copies its arrays into memory first, as a mapped file can't be replaced on Windows.
+    """
+    kept = (CellValue.WALL.value, CellValue.START.value, CellValue.GOAL.value)
+    values = np.where(np.isin(grid.values, kept), grid.values, CellValue.OPEN.value).astype(np.uint8)
+    has_costs = not (grid.costs == 1).all()
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, HAS_MASK | (HAS_COSTS if has_costs else 0), grid.cols, grid.rows,
+                         *grid.start_pos, *grid.goal_pos, grid.connectivity, grid.corner_cutting.value,
+                         grid.min_cost)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(header.ljust(HEADER_SIZE, b"\0"))
+        file.write(values.tobytes())
+        file.write(grid.graph.mask.tobytes())
+        if has_costs:
+            # Align the costs to 8 bytes
+            file.write(b"\0" * (-2 * values.nbytes % 8))
+            file.write(grid.costs.astype(np.float32).tobytes())
+    if maps(grid.values, path) or maps(grid.graph.mask, path) or maps(grid.costs, path):
+        grid.copy_arrays()
+    os.replace(temporary, path)
+
+
+def maps(array: np.ndarray, path: str) -> bool:
+    """Return True if array is memory mapped from the file at path"""
+    filename = getattr(array, "filename", None)
+    return filename is not None and os.path.exists(path) and os.path.samefile(filename, path)
+
+
+def read_header(path: str) -> Tuple:
+    """Return the fields of the header of the grid file at path"""
+    with open(path, "rb") as file:
+        fields = HEADER.unpack(file.read(HEADER.size))
+    if fields[0] != MAGIC:
+        raise ValueError(f"{path} is not a grid file")
+    if not 1 <= fields[1] <= FORMAT_VERSION:
+        raise ValueError(f"{path} has format version {fields[1]}, expected {FORMAT_VERSION} or lower")
+    return fields
+
+
+def load_grid(path: str, compact: bool = True, mmap: bool = True) -> DataGrid:
+    """Load a grid saved by save_grid
+
+    With mmap the value, mask and cost arrays are mapped copy-on-write: changes to the grid stay in memory and
+    never reach the file. Otherwise they are read into memory. Files without a cost layer get the shared layer of
+    unit costs, which is only copied when a cost is set. The neighbor masks of files without them are computed
+    from the values.
+    """
+    _, _, flags, cols, rows, sx, sy, gx, gy, connectivity, corner_cutting, min_cost = read_header(path)
+    mask_offset = HEADER_SIZE + cols * rows
+    costs_offset = mask_offset + (cols * rows if flags & HAS_MASK else 0)
+    costs_offset += -costs_offset % 8
+    values = read_layer(path, HEADER_SIZE, np.uint8, (cols, rows), mmap)
+    mask = read_layer(path, mask_offset, np.uint8, (cols, rows), mmap) if flags & HAS_MASK else None
+    costs = read_layer(path, costs_offset, np.float32, (cols, rows), mmap) if flags & HAS_COSTS else None
+    if costs is None:
+        costs = unit_costs(cols, rows)
+    return grid_from_arrays(values, costs, compact, connectivity, CornerCutting(corner_cutting), (sx, sy), (gx, gy),
+                            min_cost, mask)
+
+
+def read_layer(path: str, offset: int, dtype: type, shape: Tuple[int, int], mmap: bool) -> np.ndarray:
+    """Return the array of shape stored at offset of the file at path, mapped copy-on-write if mmap"""
+    if mmap:
+        return np.memmap(path, dtype=dtype, mode="c", offset=offset, shape=shape)
+    return np.fromfile(path, dtype=dtype, count=shape[0] * shape[1], offset=offset).reshape(shape)
+
+
+def load_movingai(path: str, compact: bool = True) -> DataGrid:
+    """Import a map of the MovingAI benchmarks (https://movingai.com/benchmarks/)
+
+    Octile maps become 8-connected grids without corner cutting, as in the benchmark scenarios. The start is put
+    on the first passable cell and the goal on the last one, column by column.
+    """
+    with open(path, "rb") as file:
+        header = {}
+        for line in file:
+            line = line.strip()
+            if line == b"map":
+                break
+            key, _, value = line.partition(b" ")
+            header[key.decode()] = value.decode()
+        rows, cols = int(header["height"]), int(header["width"])
+        lines = file.read().split()
+    if len(lines) < rows or any(len(line) != cols for line in lines[:rows]):
+        raise ValueError(f"{path} doesn't hold {rows} rows of {cols} cells")
+    # The lines are the rows of the map, values are indexed [x, y]
+    chars = np.frombuffer(b"".join(lines[:rows]), dtype=np.uint8).reshape(rows, cols).T
+    passable = np.isin(chars, np.frombuffer(MOVINGAI_PASSABLE, dtype=np.uint8))
+    values = np.where(passable, CellValue.OPEN.value, CellValue.WALL.value).astype(np.uint8)
+    open_cells = np.flatnonzero(passable)
+    if not open_cells.size:
+        raise ValueError(f"{path} has no passable cells")
+    start = divmod(int(open_cells[0]), rows)
+    goal = divmod(int(open_cells[-1]), rows)
+    connectivity = 8 if header.get("type") == "octile" else 4
+    return grid_from_arrays(values, unit_costs(cols, rows), compact, connectivity,
+                            CornerCutting.NEVER, start, goal, 1.0)
+
+
+def open_grid(path: str, compact: bool = True) -> DataGrid:
+    """Load a grid file or import a MovingAI map, depending on the file extension"""
+    if path.endswith(".map"):
+        return load_movingai(path, compact)
+    return load_grid(path, compact)
+
+
+def grid_from_arrays(values: np.ndarray, costs: np.ndarray, compact: bool, connectivity: int,
+                     corner_cutting: CornerCutting, start: Tuple[int, int], goal: Tuple[int, int],
+                     min_cost: Optional[float] = None, mask: Optional[np.ndarray] = None) -> DataGrid:
+    """Return a grid working on values, costs and the neighbor masks if they are given, with start and goal set"""
+    # An empty grid is created first, so no arrays of the full size are allocated only to be replaced
+    grid = DataGrid(rows=0, cols=0, compact=compact, connectivity=connectivity, corner_cutting=corner_cutting)
+    grid.use_arrays(values, costs, min_cost, mask)
+    # A start or goal outside the grid was removed before the grid was saved and stays removed
+    if not grid.set_start(start):
+        grid.start_pos = start
+    if not grid.set_goal(goal):
+        grid.goal_pos = goal
+    return grid
@@ -0,0 +1,291 @@
+"""Hierarchical path finding (HPA*) on an abstract graph of cluster entrances
+
+Reference:
+Botea, Müller, Schaeffer: Near Optimal Hierarchical Path-Finding (2004)
+"""
+from heapq import heappush, heappop
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+import numpy as np
+from src.cell import CellValue
+from src.data import DataGrid, REGION_SIZE
+from src.algorithms.astar import AStar
+from src.graph import CornerCutting, SQRT2, distance, relax
+from src.solver import SolveResult, solve
+
+# Entrances of at least this many cells get a transition at both ends instead of one in the middle
+ENTRANCE_SPLIT = 6
+
+
+def runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """Return the (begin, end) indices of the runs of True in the 1D boolean array mask"""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+
+class ClusterGraph:
+    """Abstract graph of a grid divided into square clusters
+
+    The nodes are the cells on both sides of the entrances between neighboring clusters. Nodes of neighboring
+    clusters are connected by a single step, nodes of the same cluster by the cost of the cheapest path inside the
+    cluster. These intra-cluster costs are computed when a cluster is first searched through (or all at once by
+    prepare). Queries search the abstract graph and refine each of its edges by a search inside one cluster, the
+    paths are near optimal.
+
+    Changes of the grid are picked up from its region versions before every query, only the clusters of changed
+    regions and their borders are rebuilt. The default cluster size matches the regions exactly.
+    """
+    grid: DataGrid
+    # Edge length of the clusters
+    size: int
+    # Number of clusters along x and y
+    shape: Tuple[int, int]
+
+    # Pairs of cells (one in each cluster) the borders between neighboring clusters can be crossed at
+    transitions: Dict[Tuple[Tuple[int, int], Tuple[int, int]], List[Tuple[Tuple[int, int], Tuple[int, int]]]]
+    # Nodes of every cluster and the nodes of the neighboring clusters every node is connected to
+    nodes: Dict[Tuple[int, int], Set[Tuple[int, int]]]
+    partners: Dict[Tuple[int, int], List[Tuple[int, int]]]
+    # Cost of the cheapest path inside the cluster between any two of its nodes (clusters not searched yet are missing)
+    edges: Dict[Tuple[int, int], Dict[Tuple[int, int], Dict[Tuple[int, int], float]]]
+
+    # Versions of the grid the graph was built for
+    version: int
+    region_versions: np.ndarray
+
+    def __init__(self, grid: DataGrid, size: int = REGION_SIZE):
+        self.grid = grid
+        self.size = size
+        self.shape = ((grid.cols + size - 1) // size, (grid.rows + size - 1) // size)
+        self.build()
+
+    def build(self) -> None:
+        """Find the entrances of all clusters and forget all intra-cluster costs"""
+        self.transitions = {}
+        self.nodes = {(cx, cy): set() for cx in range(self.shape[0]) for cy in range(self.shape[1])}
+        self.partners = {}
+        self.edges = {}
+        for cx, cy in self.nodes:
+            for neighbor in ((cx + 1, cy), (cx, cy + 1)):
+                if neighbor in self.nodes:
+                    self.add_transitions((cx, cy), neighbor)
+        self.version = self.grid.version
+        self.region_versions = self.grid.region_versions.copy()
+
+    def prepare(self) -> None:
+        """Compute the intra-cluster costs of all clusters up front"""
+        self.update()
+        for cluster in self.nodes:
+            self.cluster_edges(cluster)
+
+    def update(self) -> None:
+        """Rebuild the clusters in the regions of the grid changed since the graph was built"""
+        if self.grid.version == self.version:
+            return
+        changed = np.argwhere(self.grid.region_versions != self.region_versions)
+        if len(changed) == self.region_versions.size:
+            self.build()
+            return
+        dirty = set()
+        for rx, ry in changed.tolist():
+            # Clusters overlapping the region
+            for cx in range(rx * REGION_SIZE // self.size, min(((rx + 1) * REGION_SIZE - 1) // self.size + 1,
+                                                               self.shape[0])):
+                for cy in range(ry * REGION_SIZE // self.size, min(((ry + 1) * REGION_SIZE - 1) // self.size + 1,
+                                                                   self.shape[1])):
+                    dirty.add((cx, cy))
+        for cluster in dirty:
+            self.rebuild_cluster(cluster)
+        self.version = self.grid.version
+        self.region_versions = self.grid.region_versions.copy()
+
+    def rebuild_cluster(self, cluster: Tuple[int, int]) -> None:
+        """Find the entrances on the borders of cluster again and forget the costs of the clusters around them"""
+        cx, cy = cluster
+        for neighbor in ((cx - 1, cy), (cx + 1, cy), (cx, cy - 1), (cx, cy + 1)):
+            if neighbor in self.nodes:
+                self.remove_transitions(min(cluster, neighbor), max(cluster, neighbor))
+                self.add_transitions(min(cluster, neighbor), max(cluster, neighbor))
+                self.edges.pop(neighbor, None)
+        self.edges.pop(cluster, None)
+
+    def add_transitions(self, a: Tuple[int, int], b: Tuple[int, int]) -> None:
+        """Find the transitions on the border between cluster a and the cluster b right or below it"""
+        size = self.size
+        values = self.grid.values
+        wall = CellValue.WALL.value
+        if b[0] != a[0]:
+            # Vertical border between the columns x - 1 and x
+            x, y0 = b[0] * size, a[1] * size
+            y1 = min(y0 + size, self.grid.rows)
+            crossable = (values[x - 1, y0:y1] != wall) & (values[x, y0:y1] != wall)
+            pairs = [((x - 1, y0 + i), (x, y0 + i)) for i in range(y1 - y0)]
+        else:
+            # Horizontal border between the rows y - 1 and y
+            x0, y = a[0] * size, b[1] * size
+            x1 = min(x0 + size, self.grid.cols)
+            crossable = (values[x0:x1, y - 1] != wall) & (values[x0:x1, y] != wall)
+            pairs = [((x0 + i, y - 1), (x0 + i, y)) for i in range(x1 - x0)]
+
+        transitions = []
+        for begin, end in runs(crossable):
+            if end - begin < ENTRANCE_SPLIT:
+                transitions.append(pairs[(begin + end - 1) // 2])
+            else:
+                transitions += [pairs[begin], pairs[end - 1]]
+        self.transitions[(a, b)] = transitions
+        for pa, pb in transitions:
+            self.nodes[a].add(pa)
+            self.nodes[b].add(pb)
+            self.partners.setdefault(pa, []).append(pb)
+            self.partners.setdefault(pb, []).append(pa)
+
+    def remove_transitions(self, a: Tuple[int, int], b: Tuple[int, int]) -> None:
+        """Drop the transitions on the border between cluster a and the cluster b right or below it"""
+        for pa, pb in self.transitions.pop((a, b), []):
+            for pos, other, cluster in ((pa, pb, a), (pb, pa, b)):
+                self.partners[pos].remove(other)
+                if not self.partners[pos]:
+                    del self.partners[pos]
+                    self.nodes[cluster].discard(pos)
+
+    def cluster_of(self, pos: Tuple[int, int]) -> Tuple[int, int]:
+        """Return the cluster containing pos"""
+        return pos[0] // self.size, pos[1] // self.size
+
+    def cluster_edges(self, cluster: Tuple[int, int]) -> Dict[Tuple[int, int], Dict[Tuple[int, int], float]]:
+        """Return the costs between the nodes of cluster, searching the cluster if they aren't known yet"""
+        edges = self.edges.get(cluster)
+        if edges is None:
+            nodes = list(self.nodes[cluster])
+            x0, y0 = cluster[0] * self.size, cluster[1] * self.size
+            window = (slice(x0, x0 + self.size), slice(y0, y0 + self.size))
+            mask = self.grid.graph.mask[window]
+            # Search from all nodes of the cluster at once
+            dist = np.full((len(nodes),) + mask.shape, np.inf)
+            xs, ys = np.array(nodes, dtype=np.intp).reshape(-1, 2).T
+            dist[np.arange(len(nodes)), xs - x0, ys - y0] = 0
+            relax(dist, mask, self.grid.costs[window], self.grid.connectivity)
+            costs = dist[:, xs - x0, ys - y0].tolist()
+            edges = self.edges[cluster] = {}
+            for node, row in zip(nodes, costs):
+                edges[node] = {other: cost for other, cost in zip(nodes, row) if other != node and cost < np.inf}
+        return edges
+
+    def search_cluster(self, source: Tuple[int, int], target: Optional[Tuple[int, int]] = None,
+                       reverse: bool = False) -> Tuple[Dict[Tuple[int, int], float], Dict[Tuple[int, int], Any]]:
+        """Run Dijkstra from source without leaving its cluster
+
+        Returns the cost of the cheapest path from source to every cell reached (from every cell to source if
+        reverse) and the parent of every cell reached. The search stops early once target is reached.
+        """
+        size = self.size
+        cx, cy = self.cluster_of(source)
+        x0, y0 = cx * size, cy * size
+        costs = self.grid.costs
+        neighbors = self.grid.graph.neighbors
+        dist = {source: 0.0}
+        parents = {}
+        queue = [(0.0, source)]
+        while queue:
+            d, pos = heappop(queue)
+            if d > dist[pos]:
+                continue
+            if pos == target:
+                break
+            x, y = pos
+            for neighbor in neighbors(pos):
+                nx, ny = neighbor
+                if not (0 <= nx - x0 < size and 0 <= ny - y0 < size):
+                    continue
+                # Steps cost as much as entering the cell they lead to on the way from start to goal
+                weight = costs.item(pos if reverse else neighbor)
+                if nx != x and ny != y:
+                    weight *= SQRT2
+                if d + weight < dist.get(neighbor, float("inf")):
+                    dist[neighbor] = d + weight
+                    parents[neighbor] = pos
+                    heappush(queue, (d + weight, neighbor))
+        return dist, parents
+
+    def solve(self, start: Optional[Tuple[int, int]] = None, goal: Optional[Tuple[int, int]] = None) -> SolveResult:
+        """Search the abstract graph from start to goal and refine the result to a path of cells
+
+        start and goal default to the start and goal of the grid. The expanded count is the number of abstract
+        nodes expanded. Unlike the algorithms, the search doesn't mark any cells. Like solve(), nothing is searched
+        if start or goal is a wall or the two lie in different components.
+        """
+        grid = self.grid
+        start = grid.start_pos if start is None else start
+        goal = grid.goal_pos if goal is None else goal
+        # Labeling the components isn't part of the elapsed time, as in solve()
+        if not grid.is_reachable(start, goal):
+            return SolveResult([], float("inf"), 0, 0.0)
+        begin = perf_counter()
+        self.update()
+        start_cluster, goal_cluster = self.cluster_of(start), self.cluster_of(goal)
+
+        # Connect start and goal to the nodes of their clusters
+        from_start, _ = self.search_cluster(start)
+        to_goal, _ = self.search_cluster(goal, reverse=True)
+
+        costs = grid.costs
+        min_cost = grid.min_cost
+        connectivity = grid.connectivity
+        g_score = {start: 0.0}
+        came_from = {}
+        queue = [(min_cost * distance(start, goal, connectivity), 0, start)]
+        count = 0
+        expanded = 0
+        closed = set()
+        while queue:
+            _, _, current = heappop(queue)
+            if current in closed:
+                continue
+            closed.add(current)
+            expanded += 1
+            if current == goal:
+                break
+
+            cluster = self.cluster_of(current)
+            if current == start:
+                successors = [(node, from_start[node]) for node in self.nodes[start_cluster] if node in from_start]
+            else:
+                successors = list(self.cluster_edges(cluster).get(current, {}).items())
+            successors += [(partner, costs.item(partner)) for partner in self.partners.get(current, ())]
+            if cluster == goal_cluster and current in to_goal:
+                successors.append((goal, to_goal[current]))
+
+            for node, cost in successors:
+                tentative_g_score = g_score[current] + cost
+                if tentative_g_score < g_score.get(node, float("inf")):
+                    g_score[node] = tentative_g_score
+                    came_from[node] = current
+                    count += 1
+                    heappush(queue, (tentative_g_score + min_cost * distance(node, goal, connectivity), count, node))
+
+        if goal not in closed:
+            if connectivity == 8 and grid.corner_cutting is CornerCutting.ALWAYS:
+                # Clusters can also touch through a diagonal step between two walls, which isn't an entrance
+                result = solve(grid, AStar, start, goal)
+                grid.reset()
+                result.elapsed = perf_counter() - begin
+                return result
+            return SolveResult([], float("inf"), expanded, perf_counter() - begin)
+
+        # Refine the abstract path: steps between clusters are taken as they are, the rest is searched again
+        abstract = [goal]
+        while abstract[-1] in came_from:
+            abstract.append(came_from[abstract[-1]])
+        abstract.reverse()
+        path = [start]
+        for a, b in zip(abstract, abstract[1:]):
+            if self.cluster_of(a) != self.cluster_of(b):
+                path.append(b)
+                continue
+            _, parents = self.search_cluster(a, target=b)
+            segment = [b]
+            while segment[-1] != a:
+                segment.append(parents[segment[-1]])
+            path += segment[-2::-1]
+        return SolveResult(path, grid.path_cost(path), expanded, perf_counter() - begin)
@@ -0,0 +1,114 @@
+"""Counters, step timings and hooks of instrumented searches
+
+An algorithm is instrumented by setting its probe (Algorithm.instrument). The algorithms report their expansions,
+pushes and pops to the probe only if one is set, otherwise the instrumentation costs a single None check per
+event. The steps of an instrumented algorithm are timed by Algorithm.step.
+"""
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from time import perf_counter_ns
+from typing import Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from src.algorithms.algorithm import Algorithm
+    from src.data import DataGrid
+
+# Hooks receive the position of the cell the event happened to
+Hook = Callable[[Tuple[int, int]], None]
+
+
+@dataclass
+class Instrumentation:
+    """Statistics of the searches of the algorithms it is the probe of"""
+    # Cells expanded
+    expanded: int = 0
+    # Entries put to the frontier, duplicates are cells that were in the frontier already
+    pushes: int = 0
+    duplicate_pushes: int = 0
+    # Entries taken from the frontier, stale ones are outdated entries that are skipped
+    pops: int = 0
+    stale_pops: int = 0
+    # Largest number of entries in the frontier
+    peak_frontier: int = 0
+    # Number and summed duration of the timed steps
+    steps: int = 0
+    step_ns: int = 0
+    # Number of steps per duration, bucket b counts the steps that took 2 ** (b - 1) to 2 ** b nanoseconds
+    step_histogram: Counter = field(default_factory=Counter)
+
+    on_expand: List[Hook] = field(repr=False, default_factory=list)
+    on_push: List[Hook] = field(repr=False, default_factory=list)
+    on_pop: List[Hook] = field(repr=False, default_factory=list)
+    # Called with the number and the duration in nanoseconds of every timed step
+    on_step: List[Callable[[int, int], None]] = field(repr=False, default_factory=list)
+
+    def expand(self, pos: Tuple[int, int]) -> None:
+        """Count the expansion of the cell at pos"""
+        self.expanded += 1
+        for hook in self.on_expand:
+            hook(pos)
+
+    def push(self, pos: Tuple[int, int], frontier: int, duplicate: bool = False) -> None:
+        """Count an entry of the cell at pos put to a frontier that holds frontier entries afterwards"""
+        self.pushes += 1
+        if duplicate:
+            self.duplicate_pushes += 1
+        if frontier > self.peak_frontier:
+            self.peak_frontier = frontier
+        for hook in self.on_push:
+            hook(pos)
+
+    def pop(self, pos: Tuple[int, int], stale: bool = False) -> None:
+        """Count an entry of the cell at pos taken from the frontier"""
+        self.pops += 1
+        if stale:
+            self.stale_pops += 1
+        for hook in self.on_pop:
+            hook(pos)
+
+    def step(self, algo: 'Algorithm', grid: 'DataGrid'):
+        """Run and time one step of algo and return its result"""
+        begin = perf_counter_ns()
+        result = algo.run_algorithm(grid)
+        elapsed = perf_counter_ns() - begin
+        self.steps += 1
+        self.step_ns += elapsed
+        self.step_histogram[elapsed.bit_length()] += 1
+        for hook in self.on_step:
+            hook(self.steps, elapsed)
+        return result
+
+    def percentile(self, fraction: float) -> int:
+        """Return the upper bound in nanoseconds of the histogram bucket that holds the given fraction of steps"""
+        seen = 0
+        for bucket in sorted(self.step_histogram):
+            seen += self.step_histogram[bucket]
+            if seen >= fraction * self.steps:
+                return 2 ** bucket
+        return 0
+
+    def to_dict(self) -> Dict:
+        """Return the statistics as a dict of plain numbers"""
+        return {
+            "expanded": self.expanded,
+            "pushes": self.pushes,
+            "duplicate_pushes": self.duplicate_pushes,
+            "pops": self.pops,
+            "stale_pops": self.stale_pops,
+            "peak_frontier": self.peak_frontier,
+            "steps": self.steps,
+            "step_ns": self.step_ns,
+            "step_p50_ns": self.percentile(0.5),
+            "step_p99_ns": self.percentile(0.99),
+            # Keys are the upper bounds of the buckets in nanoseconds
+            "step_histogram": {str(2 ** bucket): count for bucket, count in sorted(self.step_histogram.items())},
+        }
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        """Return the statistics as JSON and write them to path if it is given"""
+        text = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, "w") as file:
+                file.write(text)
+        return text
@@ -1,10 +1,26 @@
 import pygame
-from typing import List, Tuple, Type
+import numpy as np
+from typing import List, Optional, Tuple, Type
 from src.data import DataGrid
-from src.cell import CellValue
+from src.cell import CELL_SIZE, CELL_VALUES, CellValue
+from src.graph import CornerCutting
+from src.gridfile import save_grid
+from src.trace import Trace
+from src.worker import SearchWorker
 from src.style.colors import Colors
+from src.style.palette import (FILL_COLORS, BORDER_COLORS, FILL_PALETTE, BORDER_PALETTE, AGGREGATE_PALETTE,
+                               AGGREGATE_ORDER, aggregate_ranks, terrain_colors)
 from src.algorithms.algorithm import Algorithm
 
+# Color key of the grid line stencil, must not be used by the palettes
+LINE_KEY = (255, 0, 255)
+# Largest window size, grids that don't fit at the size of their cells are shown zoomed out
+MAX_WINDOW = (1600, 900)
+# Pixels per cell of the zoom levels, at fractions every pixel shows a square block of cells
+ZOOM_LEVELS = (1 / 64, 1 / 32, 1 / 16, 1 / 8, 1 / 4, 1 / 2, 1, 2, 3, 4, 6, 8, 12, 16, 20, 24, 32, 48)
+# Grid lines are only drawn around cells of at least this many pixels
+MIN_LINE_ZOOM = 5
+
 
 class Button:
     def __init__(self, name, x, y, algo, size=(225, 75), color=Colors.BUTTON, text_color=Colors.BUTTON_TEXT):
@@ -36,8 +52,14 @@ class Button:
 
 
 class Interface:
-    """Class to handle the user interface"""
+    """Class to handle the user interface
+
+    The window shows a viewport of the grid: view is the top left cell in the window and zoom the number of pixels
+    per cell. Zoomed out below one pixel per cell, every pixel shows the most important value of a block of cells.
+    """
     cell_size: int
+    zoom: float
+    view: Tuple[int, int]
 
     screen_width: int
     screen_height: int
@@ -50,11 +72,37 @@ class Interface:
     app_find_path: bool
     app_chosen_algo: Type[Algorithm]
 
-    def __init__(self, grid: DataGrid):
-        self.cell_size = grid.cells[0][0].size
+    # Cost painted by left clicks, None to draw walls instead
+    brush_cost: Optional[float]
+    # File the grid is saved to when s is pressed
+    save_path: str
+    # True if searches run at full speed and are replayed from their trace afterwards
+    trace_mode: bool
+    # True if searches run on a background worker while the window shows snapshots of their progress
+    background_mode: bool
+    # True if the statistics of every search are printed as JSON when it stops
+    instrument_mode: bool
+    # File a trace is exported to when e is pressed during its replay
+    trace_path: str = "trace.npz"
+    # Steps per second replayed at the start of a replay
+    replay_speed: float = 240.0
+
+    # True if the next frame has to redraw all cells, e.g. after the buttons were shown
+    full_redraw: bool
+    # Above this number of changed cells the whole grid is redrawn from the value array
+    max_changed_cells: int = 500
 
-        self.screen_width = grid.cols * self.cell_size
-        self.screen_height = grid.rows * self.cell_size
+    # Cached grid lines of the current zoom level in LINE_KEY, transparent elsewhere
+    line_stencil: Optional[pygame.Surface]
+
+    def __init__(self, grid: DataGrid, save_path: str = "saved.grid"):
+        self.cell_size = CELL_SIZE
+
+        # Cells are shown at their size unless the grid doesn't fit into the largest window
+        self.zoom = self.fit_zoom(grid)
+        self.view = (0, 0)
+        self.screen_width = min(MAX_WINDOW[0], int(np.ceil(grid.cols * self.zoom)))
+        self.screen_height = min(MAX_WINDOW[1], int(np.ceil(grid.rows * self.zoom)))
         self.screen_size = (self.screen_width, self.screen_height)
         self.screen = pygame.display.set_mode(self.screen_size)
 
@@ -62,6 +110,20 @@ class Interface:
 
         self.app_quit = False
         self.app_find_path = False
+        # Set by [ESC] while a search is running
+        self.app_cancel = False
+
+        self.brush_cost = None
+        self.save_path = save_path
+        self.trace_mode = False
+        self.background_mode = False
+        self.instrument_mode = False
+
+        # Only the cells changed since the last frame are drawn
+        grid.track_changes()
+        self.full_redraw = True
+
+        self.line_stencil = None
 
     def handle(self, grid):
         """Process events and update the display"""
@@ -69,7 +131,12 @@ class Interface:
             if event.type == pygame.QUIT:
                 self.app_quit = True
                 return
-            if not self.app_find_path:
+            if self.handle_view_event(grid, event):
+                continue
+            if self.app_find_path:
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                    self.app_cancel = True
+            else:
                 # Allow inputs only while the algorithm is not running
                 if event.type == pygame.MOUSEBUTTONDOWN or event.type == pygame.MOUSEBUTTONUP:
                     # If a change in button state of the mouse is registered, update the buttons
@@ -80,29 +147,226 @@ class Interface:
                         self.app_find_path = True
                     elif event.key == pygame.K_r:
                         grid.reset_all()
+                    elif event.key == pygame.K_d:
+                        # Toggle diagonal moves
+                        grid.set_connectivity(12 - grid.connectivity)
+                        print(f"{grid.connectivity}-connected, corner cutting: {grid.corner_cutting.name}")
+                    elif event.key == pygame.K_c:
+                        # Cycle through the corner cutting rules
+                        rules = list(CornerCutting)
+                        grid.set_connectivity(grid.connectivity, rules[(rules.index(grid.corner_cutting) + 1) % 3])
+                        print(f"{grid.connectivity}-connected, corner cutting: {grid.corner_cutting.name}")
+                    elif event.key == pygame.K_s:
+                        save_grid(grid, self.save_path)
+                        print(f"Saved to {self.save_path}")
+                    elif event.key == pygame.K_t:
+                        self.trace_mode = not self.trace_mode
+                        print(f"Trace mode {'on' if self.trace_mode else 'off'}")
+                    elif event.key == pygame.K_b:
+                        self.background_mode = not self.background_mode
+                        print(f"Background mode {'on' if self.background_mode else 'off'}")
+                    elif event.key == pygame.K_i:
+                        self.instrument_mode = not self.instrument_mode
+                        print(f"Instrumentation {'on' if self.instrument_mode else 'off'}")
+                    elif event.key == pygame.K_w:
+                        # Left clicks draw walls again
+                        self.brush_cost = None
+                    elif pygame.K_1 <= event.key <= pygame.K_9:
+                        # Left clicks paint terrain of the chosen cost
+                        self.brush_cost = float(event.key - pygame.K_0)
                 # Process the mouse inputs
                 self.handle_mouse_inputs(grid)
-        self.draw_cells(grid)
-        pygame.display.update()
+        self.refresh(grid)
+
+    def refresh(self, grid: DataGrid):
+        """Draw the cells changed since the last frame, or all of them if too many changed"""
+        if self.full_redraw or grid.changed_all or len(grid.changes) > self.max_changed_cells:
+            self.draw_cells(grid)
+            pygame.display.update()
+        else:
+            pygame.display.update(self.draw_changed_cells(grid))
+        grid.clear_changes()
+        self.full_redraw = False
+
+    def fit_zoom(self, grid: DataGrid) -> float:
+        """Return the largest zoom level up to the cell size that shows the whole grid in the largest window"""
+        width, height = MAX_WINDOW
+        fitting = [zoom for zoom in ZOOM_LEVELS
+                   if zoom <= self.cell_size and grid.cols * zoom <= width and grid.rows * zoom <= height]
+        return fitting[-1] if fitting else ZOOM_LEVELS[0]
+
+    def visible_cells(self, grid: DataGrid) -> Tuple[int, int]:
+        """Return the number of columns and rows of the grid in the window, starting at the view"""
+        cols = int(np.ceil(self.screen_width / self.zoom))
+        rows = int(np.ceil(self.screen_height / self.zoom))
+        return min(cols, grid.cols - self.view[0]), min(rows, grid.rows - self.view[1])
+
+    def set_view(self, grid: DataGrid, x: float, y: float, zoom: Optional[float] = None) -> None:
+        """Move the top left corner of the window to cell (x, y) and change the zoom, keeping the grid in view"""
+        if zoom is not None and zoom != self.zoom:
+            self.zoom = zoom
+            self.line_stencil = None
+        # Zoomed out the view moves in whole blocks
+        step = 1 if self.zoom >= 1 else int(round(1 / self.zoom))
+        max_x = max(grid.cols - int(self.screen_width / self.zoom), 0)
+        max_y = max(grid.rows - int(self.screen_height / self.zoom), 0)
+        x = min(max(int(x), 0), max_x) // step * step
+        y = min(max(int(y), 0), max_y) // step * step
+        self.view = (x, y)
+        self.full_redraw = True
+
+    def handle_view_event(self, grid: DataGrid, event: pygame.event.Event) -> bool:
+        """Zoom with the mouse wheel, pan with the arrow keys and fit the grid into the window with [z]
+
+        Returns True if event changed the view.
+        """
+        x, y = self.view
+        if event.type == pygame.MOUSEWHEEL:
+            level = ZOOM_LEVELS.index(self.zoom) + (1 if event.y > 0 else -1)
+            if not 0 <= level < len(ZOOM_LEVELS):
+                return True
+            # The cell under the mouse stays where it is
+            mx, my = pygame.mouse.get_pos()
+            zoom = ZOOM_LEVELS[level]
+            self.set_view(grid, x + mx / self.zoom - mx / zoom, y + my / self.zoom - my / zoom, zoom)
+            return True
+        if event.type != pygame.KEYDOWN:
+            return False
+        # Arrow keys move the view by a quarter of the window
+        dx = int(self.screen_width / self.zoom) // 4 or 1
+        dy = int(self.screen_height / self.zoom) // 4 or 1
+        moves = {pygame.K_LEFT: (-dx, 0), pygame.K_RIGHT: (dx, 0), pygame.K_UP: (0, -dy), pygame.K_DOWN: (0, dy)}
+        if event.key in moves:
+            self.set_view(grid, x + moves[event.key][0], y + moves[event.key][1])
+        elif event.key == pygame.K_z:
+            self.set_view(grid, 0, 0, self.fit_zoom(grid))
+        else:
+            return False
+        return True
+
+    def make_line_stencil(self) -> pygame.Surface:
+        """Create the surface with the one pixel wide border of every cell in LINE_KEY"""
+        size = int(self.zoom)
+        x = np.arange(self.screen_width) % size
+        y = np.arange(self.screen_height) % size
+        lines = ((x == 0) | (x == size - 1))[:, None] | ((y == 0) | (y == size - 1))[None, :]
+        pixels = np.zeros((self.screen_width, self.screen_height, 3), dtype=np.uint8)
+        pixels[lines] = LINE_KEY
+        stencil = pygame.surfarray.make_surface(pixels)
+        stencil.set_colorkey((0, 0, 0))
+        return stencil
+
+    def draw_cells(self, grid, values: Optional[np.ndarray] = None):
+        """Draw all the cells in view to the screen
+
+        The values of the cells (or values, e.g. a snapshot of them) are mapped to their colors through the palettes
+        at once. The resulting images with one pixel per cell are scaled up to the window: first the border colors,
+        then the fill colors everywhere except on the grid lines. Zoomed out, every pixel is colored by the most
+        important value of its block of cells instead.
+        """
+        values = grid.values if values is None else values
+        x, y = self.view
+        cols, rows = self.visible_cells(grid)
+        window = values[x:x + cols, y:y + rows]
+        self.screen.fill(Colors.BACKGROUND)
+        if self.zoom < 1:
+            block = int(round(1 / self.zoom))
+            ranks = aggregate_ranks(window, block)
+            fill = AGGREGATE_PALETTE[ranks]
+            # Open blocks are shaded by the cost of their first cell
+            costs = grid.costs[x:x + cols:block, y:y + rows:block]
+            terrain = (ranks == 0) & (costs != 1)
+            if terrain.any():
+                fill[terrain] = terrain_colors(costs[terrain])
+            self.screen.blit(pygame.surfarray.make_surface(fill), (0, 0))
+            return
+
+        size = int(self.zoom)
+        area = (cols * size, rows * size)
+        fill = FILL_PALETTE[window]
+        # Open cells are shaded by their cost
+        costs = grid.costs[x:x + cols, y:y + rows]
+        terrain = (window == CellValue.OPEN.value) & (costs != 1)
+        if terrain.any():
+            fill[terrain] = terrain_colors(costs[terrain])
+        fill_layer = pygame.transform.scale(pygame.surfarray.make_surface(fill), area)
+        if size >= MIN_LINE_ZOOM:
+            border = pygame.surfarray.make_surface(BORDER_PALETTE[window])
+            self.screen.blit(pygame.transform.scale(border, area), (0, 0))
+            if self.line_stencil is None:
+                self.line_stencil = self.make_line_stencil()
+            fill_layer.set_colorkey(LINE_KEY)
+            fill_layer.blit(self.line_stencil, (0, 0))
+        self.screen.blit(fill_layer, (0, 0))
+
+    def draw_changed_cells(self, grid: DataGrid) -> List[pygame.Rect]:
+        """Draw the cells in view changed since the last frame to the screen and return their rects"""
+        rects = []
+        if self.zoom < 1:
+            # Redraw the pixels of the blocks with changed cells
+            block = int(round(1 / self.zoom))
+            x, y = self.view
+            cols, rows = self.visible_cells(grid)
+            pixels = {((cx - x) // block, (cy - y) // block) for cx, cy in grid.changes
+                      if 0 <= cx - x < cols and 0 <= cy - y < rows}
+            for px, py in pixels:
+                bx, by = x + px * block, y + py * block
+                rank = aggregate_ranks(grid.values[bx:bx + block, by:by + block], block).item(0)
+                fill = AGGREGATE_PALETTE[rank]
+                cost = grid.costs.item(bx, by)
+                if AGGREGATE_ORDER[rank] is CellValue.OPEN and cost != 1:
+                    fill = terrain_colors(cost)
+                rect = pygame.Rect(px, py, 1, 1)
+                self.screen.fill(tuple(fill), rect)
+                rects.append(rect)
+            return rects
+        for pos in grid.changes:
+            rect = self.cell_rect(pos)
+            if rect is not None:
+                self.draw_cell(grid, pos, rect)
+                rects.append(rect)
+        return rects
+
+    def cell_rect(self, pos: Tuple[int, int]) -> Optional[pygame.Rect]:
+        """Return the rect of the cell at pos in the window, None if it is out of view (only when zoomed in)"""
+        size = int(self.zoom)
+        rect = pygame.Rect((pos[0] - self.view[0]) * size, (pos[1] - self.view[1]) * size, size, size)
+        if rect.right <= 0 or rect.bottom <= 0 or rect.left >= self.screen_width or rect.top >= self.screen_height:
+            return None
+        return rect
 
-    def draw_cells(self, grid):
-        """Draw all the cells in the grid to the screen"""
-        for col in grid.cells:
-            for cell in col:
-                cell.update_color()
-                pygame.draw.rect(self.screen, cell.fill_color, cell.rect)
-                pygame.draw.rect(self.screen, cell.border_color, cell.border, 1)
+    def draw_cell(self, grid: DataGrid, pos: Tuple[int, int], rect: pygame.Rect):
+        """Draw a single cell to the screen"""
+        value = CELL_VALUES[grid.values.item(pos)]
+        fill = FILL_COLORS[value]
+        cost = grid.costs.item(pos)
+        if value is CellValue.OPEN and cost != 1:
+            fill = tuple(terrain_colors(cost))
+        pygame.draw.rect(self.screen, fill, rect)
+        if rect.width >= MIN_LINE_ZOOM:
+            pygame.draw.rect(self.screen, BORDER_COLORS[value], rect, 1)
 
     def handle_mouse_inputs(self, grid: DataGrid):
-        """Process mouse clicks"""
+        """Process mouse clicks
+
+        Zoomed out, walls and terrain are drawn and cleared on the whole block of cells under the mouse.
+        """
         for button, pressed in enumerate(self.mouse_state):
             if pressed:
-                x, y = self.get_mouse_pos()
+                pos = self.get_mouse_pos(grid)
+                if pos is None:
+                    continue
+                x, y = pos
                 cell = grid.cells[x][y]
                 if button == 0:
-                    # Left click draws walls
-                    if not cell.start and not cell.goal:
-                        cell.value = CellValue.WALL
+                    # Left click draws walls or paints terrain
+                    for bx, by in self.brush_cells(grid, pos):
+                        if self.brush_cost is not None:
+                            if grid.values.item(bx, by) == CellValue.WALL.value:
+                                grid.set_cell_value((bx, by), CellValue.OPEN)
+                            grid.set_cost((bx, by), self.brush_cost)
+                        elif (bx, by) != grid.start_pos and (bx, by) != grid.goal_pos:
+                            grid.set_cell_value((bx, by), CellValue.WALL)
                 elif button == 1:
                     # Middle click to move start / goal
                     if cell.start:
@@ -115,18 +379,31 @@ class Interface:
                         elif not grid.pos_in_grid(grid.goal_pos):
                             grid.set_goal((x, y))
                 elif button == 2:
-                    # Right click removes walls
-                    if not cell.start and not cell.goal:
-                        grid.cells[x][y].value = CellValue.OPEN
-
-    def get_mouse_pos(self):
-        """Return mouse position (in cell units)"""
-        pos = pygame.mouse.get_pos()
-        # Transform window pos to cell pos
-        x, y = [coord // self.cell_size for coord in pos]
-        return x, y
-
-    def choose_algorithm(self, algorithms: List[Type[Algorithm]]) -> Type[Algorithm]:
+                    # Right click removes walls and terrain
+                    for bx, by in self.brush_cells(grid, pos):
+                        if (bx, by) != grid.start_pos and (bx, by) != grid.goal_pos:
+                            grid.set_cell_value((bx, by), CellValue.OPEN)
+                        if grid.costs.item(bx, by) != 1:
+                            grid.set_cost((bx, by), 1)
+
+    def get_mouse_pos(self, grid: DataGrid) -> Optional[Tuple[int, int]]:
+        """Return the cell under the mouse (the first of its block when zoomed out), None outside the grid"""
+        px, py = pygame.mouse.get_pos()
+        # Transform window pos to cell pos through the viewport
+        x = self.view[0] + int(px / self.zoom)
+        y = self.view[1] + int(py / self.zoom)
+        return (x, y) if grid.pos_in_grid((x, y)) else None
+
+    def brush_cells(self, grid: DataGrid, pos: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Return the cells drawn on by a click on pos: the cell itself, or its block when zoomed out"""
+        if self.zoom >= 1:
+            return [pos]
+        block = int(round(1 / self.zoom))
+        x, y = pos
+        return [(bx, by) for bx in range(x, min(x + block, grid.cols)) for by in range(y, min(y + block, grid.rows))]
+
+    def choose_algorithm(self, algorithms: List[Type[Algorithm]]) -> Optional[Type[Algorithm]]:
+        """Show a button for every algorithm and return the one clicked, None if [ESC] was pressed instead"""
         # How many button cols are needed
         num_columns = 2
 
@@ -147,8 +424,14 @@ class Interface:
             buttons.append(Button(algo.name, x_pos, y_pos, algo))
 
         chosen = None
+        clock = pygame.time.Clock()
         while not chosen:
             for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.app_quit = True
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    self.full_redraw = True
+                    return None
                 for button in buttons:
                     ret = button.check_event(event)
                     if ret:
@@ -156,8 +439,89 @@ class Interface:
             for button in buttons:
                 button.update(self.screen)
             pygame.display.update()
+            clock.tick(60)
+        # Draw the grid over the buttons in the next frame
+        self.full_redraw = True
         return chosen
 
+    def watch(self, grid: DataGrid, worker: SearchWorker):
+        """Draw the snapshots of a search running on worker until it stops, [ESC] cancels it"""
+        clock = pygame.time.Clock()
+        shown = -1
+        while worker.is_running():
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.app_quit = True
+                    worker.cancel()
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                    self.app_cancel = True
+                    worker.cancel()
+                elif self.handle_view_event(grid, event):
+                    # Draw the latest snapshot again in the new view
+                    shown = -1
+            published, snapshot = worker.latest()
+            if published != shown:
+                self.draw_cells(grid, snapshot)
+                pygame.display.update()
+                shown = published
+            clock.tick(60)
+        worker.join()
+        # The worker changed the grid behind the back of the snapshots
+        self.full_redraw = True
+        self.refresh(grid)
+
+    def replay(self, grid: DataGrid, trace: Trace):
+        """Play trace back on grid from its start
+
+        [SPACE] pauses and resumes, [LEFT] and [RIGHT] step back and forth, [UP] and [DOWN] double and halve the
+        speed, [HOME] and [END] jump to the start and the end, [e] exports the trace and [ESC] leaves the replay.
+        """
+        trace.rewind(grid)
+        step = 0
+        speed = self.replay_speed
+        playing = True
+        # Steps due but not yet shown, carried over between frames
+        budget = 0.0
+        clock = pygame.time.Clock()
+        while True:
+            target = step
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.app_quit = True
+                    return
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        return
+                    elif event.key == pygame.K_SPACE:
+                        playing = not playing
+                    elif event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                        playing = False
+                        target += 1 if event.key == pygame.K_RIGHT else -1
+                    elif event.key == pygame.K_UP:
+                        speed *= 2
+                    elif event.key == pygame.K_DOWN:
+                        speed = max(speed / 2, 1.0)
+                    elif event.key == pygame.K_HOME:
+                        target = 0
+                    elif event.key == pygame.K_END:
+                        target = len(trace)
+                    elif event.key == pygame.K_e:
+                        trace.save(self.trace_path)
+                        print(f"Exported {len(trace)} steps to {self.trace_path}")
+                    else:
+                        self.handle_view_event(grid, event)
+                else:
+                    self.handle_view_event(grid, event)
+            elapsed = clock.tick(60) / 1000
+            if playing:
+                budget += speed * elapsed
+                target += int(budget)
+                budget -= int(budget)
+            target = min(max(target, 0), len(trace))
+            trace.apply(grid, step, target)
+            step = target
+            self.refresh(grid)
+
     def wait_for_input(self):
         """Wait for user input [SPACE]"""
         while True:
@@ -170,11 +534,15 @@ class Interface:
                         return
 
     def reset_view(self, grid: DataGrid):
+        """Show the result until [SPACE] clears the search or [r] the whole map, the view can still be moved"""
+        clock = pygame.time.Clock()
         while True:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     self.app_quit = True
                     return
+                elif self.handle_view_event(grid, event):
+                    self.refresh(grid)
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_SPACE:
                         grid.reset()
@@ -182,3 +550,4 @@ class Interface:
                     elif event.key == pygame.K_r:
                         grid.reset_all()
                         return
+            clock.tick(60)
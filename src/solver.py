@@ -0,0 +1,50 @@
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import List, Optional, Tuple, Type
+from src.data import DataGrid
+from src.algorithms.algorithm import Algorithm
+from src.instrument import Instrumentation
+
+
+@dataclass
+class SolveResult:
+    """Outcome of a headless search"""
+    # Positions of the path from start to goal (empty if there is none)
+    path: List[Tuple[int, int]] = field(repr=False)
+    # Summed cost of entering the cells along the path (inf if there is none)
+    cost: float
+    # Number of cells expanded by the algorithm
+    expanded: int
+    # Wall-clock time of the search in seconds
+    elapsed: float
+
+    @property
+    def found(self) -> bool:
+        """True if a path was found"""
+        return bool(self.path)
+
+
+def solve(grid: DataGrid, algorithm: Type[Algorithm], start: Optional[Tuple[int, int]] = None,
+          goal: Optional[Tuple[int, int]] = None, probe: Optional[Instrumentation] = None) -> SolveResult:
+    """Run algorithm from start to goal until it is done, without any display
+
+    start and goal default to the start and goal of the grid. The search marks the cells it visits just like in
+    the frontend, call grid.reset() to clear them. The search is reported to probe if one is given.
+
+    If the goal lies in another component than the start, no search is run and nothing is expanded. Labeling the
+    components (once after walls changed) isn't part of the elapsed time.
+    """
+    if not grid.is_reachable(grid.start_pos if start is None else start, grid.goal_pos if goal is None else goal):
+        return SolveResult([], float("inf"), 0, 0.0)
+    begin = perf_counter()
+    algo = algorithm(grid, start, goal)
+    if probe is not None:
+        algo.instrument(probe)
+    while not algo.is_done():
+        algo.step(grid)
+    elapsed = perf_counter() - begin
+
+    if not algo.found:
+        return SolveResult([], float("inf"), algo.expanded, elapsed)
+    path = [cell.pos for cell in algo.get_path()]
+    return SolveResult(path, grid.path_cost(path), algo.expanded, elapsed)
@@ -7,5 +7,7 @@ class Colors:
     START = (0, 180, 0)
     GOAL = (200, 0, 0)
     WALL = (27, 38, 44)
+    TERRAIN = (120, 95, 60)
     BUTTON = (49, 51, 53)
+    BACKGROUND = (49, 51, 53)
     BUTTON_TEXT = GRID
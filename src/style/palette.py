@@ -0,0 +1,88 @@
+import numpy as np
+from src.cell import CellValue
+from src.style.colors import Colors
+
+# Fill color of the cells for every value
+FILL_COLORS = {
+    CellValue.OPEN: Colors.OPEN,
+    CellValue.CONSIDERED: Colors.CONSIDERED,
+    CellValue.CONSIDERING: Colors.CONSIDERING,
+    CellValue.PATH: Colors.PATH,
+    CellValue.START: Colors.START,
+    CellValue.GOAL: Colors.GOAL,
+    CellValue.WALL: Colors.WALL,
+}
+
+# Border color of the cells for every value, the grid lines are only visible around unoccupied cells
+BORDER_COLORS = {
+    CellValue.OPEN: Colors.GRID,
+    CellValue.CONSIDERED: Colors.GRID,
+    CellValue.CONSIDERING: Colors.GRID,
+    CellValue.PATH: Colors.PATH,
+    CellValue.START: Colors.START,
+    CellValue.GOAL: Colors.GOAL,
+    CellValue.WALL: Colors.WALL,
+}
+
+
+def make_palette(colors) -> np.ndarray:
+    """Return a (256, 3) uint8 lookup table mapping the raw values of DataGrid.values to RGB colors"""
+    palette = np.zeros((256, 3), dtype=np.uint8)
+    for value, color in colors.items():
+        palette[value.value] = color
+    return palette
+
+
+FILL_PALETTE = make_palette(FILL_COLORS)
+BORDER_PALETTE = make_palette(BORDER_COLORS)
+
+# Open cells of this cost are drawn in the terrain color, cheaper ones are blended towards the open color
+MAX_TERRAIN_COST = 9
+
+
+def terrain_colors(costs: np.ndarray) -> np.ndarray:
+    """Return the uint8 RGB fill colors of open cells with the given costs"""
+    shade = np.clip((np.asarray(costs, dtype=np.float32) - 1) / (MAX_TERRAIN_COST - 1), 0, 1)[..., None]
+    colors = np.array(Colors.OPEN, dtype=np.float32) * (1 - shade) + np.array(Colors.TERRAIN, dtype=np.float32) * shade
+    return colors.astype(np.uint8)
+
+
+# Values a block of cells drawn as a single pixel can show, from the least to the most important. Search marks are
+# drawn over walls so the progress of a search stays visible when zoomed out
+AGGREGATE_ORDER = [CellValue.OPEN, CellValue.WALL, CellValue.CONSIDERED, CellValue.CONSIDERING, CellValue.PATH,
+                   CellValue.START, CellValue.GOAL]
+# Fill color of every rank
+AGGREGATE_PALETTE = np.array([FILL_COLORS[value] for value in AGGREGATE_ORDER], dtype=np.uint8)
+# Rank of the raw values shifted by one modulo 8 (see aggregate_ranks)
+SHIFTED_RANKS = np.zeros(8, dtype=np.uint8)
+for rank, value in enumerate(AGGREGATE_ORDER):
+    SHIFTED_RANKS[(value.value + 1) % 8] = rank
+
+
+def block_reduce(values: np.ndarray, block: int, reduce: np.ufunc) -> np.ndarray:
+    """Reduce every block x block square of values, whose shape must be a multiple of block"""
+    cols, rows = values.shape[0] // block, values.shape[1] // block
+    # Along the columns first, which reduces contiguous rows
+    return reduce.reduce(reduce.reduce(values.reshape(cols, block, -1), axis=1).reshape(cols, rows, block), axis=2)
+
+
+def aggregate_ranks(values: np.ndarray, block: int) -> np.ndarray:
+    """Return the highest rank of every block x block square of values, partial squares at the edges included
+
+    Shifted by one modulo 8, walls become 0 and the other values keep their order, which is their order in
+    AGGREGATE_ORDER. The maximum of a shifted block is its most important value, unless it is open: then the minimum
+    tells if the block holds a wall. This is much faster than looking up the rank of every value.
+    """
+    cols, rows = -(-values.shape[0] // block), -(-values.shape[1] // block)
+    if values.shape == (cols * block, rows * block):
+        shifted = np.add(values, 1, dtype=np.uint8)
+    else:
+        # Fill the partial squares up with open cells
+        shifted = np.full((cols * block, rows * block), CellValue.OPEN.value + 1, dtype=np.uint8)
+        np.add(values, 1, out=shifted[:values.shape[0], :values.shape[1]])
+    np.bitwise_and(shifted, 7, out=shifted)
+    highest = block_reduce(shifted, block, np.maximum)
+    ranks = SHIFTED_RANKS[highest]
+    walls = (highest == CellValue.OPEN.value + 1) & (block_reduce(shifted, block, np.minimum) == 0)
+    ranks[walls] = AGGREGATE_ORDER.index(CellValue.WALL)
+    return ranks
@@ -0,0 +1,155 @@
+"""Recording searches as traces of cell changes, to replay them later without running the algorithm again
+
+Every step of a trace holds the changes of one run_algorithm call, the last one includes the path. The changes of
+all steps are stored in packed arrays: the flat index of the cell (x * rows + y), its value before and its value
+after the change. Keeping the old values lets a replay move backwards as fast as forwards.
+"""
+from array import array
+from dataclasses import dataclass, field
+from typing import Optional
+import numpy as np
+from src.data import DataGrid
+from src.algorithms.algorithm import Algorithm
+
+# Above this number of cells changed at once the whole grid is marked as changed for the frontend
+MAX_CHANGES = 1000
+
+
+@dataclass
+class Trace:
+    """Cell changes of a recorded search"""
+    # Name of the algorithm that was recorded
+    name: str
+    cols: int
+    rows: int
+    # Values of the grid when the recording started
+    base: np.ndarray = field(repr=False)
+    # Flat index, old value and new value of every change
+    index: np.ndarray = field(repr=False)
+    old: np.ndarray = field(repr=False)
+    new: np.ndarray = field(repr=False)
+    # The changes of step i are index[steps[i]:steps[i + 1]]
+    steps: np.ndarray = field(repr=False)
+
+    def __len__(self) -> int:
+        """Number of steps"""
+        return len(self.steps) - 1
+
+    @property
+    def size(self) -> int:
+        """Memory of the arrays in bytes"""
+        return self.base.nbytes + self.index.nbytes + self.old.nbytes + self.new.nbytes + self.steps.nbytes
+
+    def apply(self, grid: DataGrid, current: int, target: int) -> None:
+        """Move the values of grid from their state after current steps to the state after target steps
+
+        Only the cells changed in between are written, and recorded in the changes of the grid for the frontend.
+        """
+        if target == current:
+            return
+        if target > current:
+            begin, end = self.steps[current], self.steps[target]
+            # The last change of a cell decides its value
+            cells, last = np.unique(self.index[begin:end][::-1], return_index=True)
+            values = self.new[begin:end][::-1][last]
+        else:
+            begin, end = self.steps[target], self.steps[current]
+            # The value before the first change is restored
+            cells, first = np.unique(self.index[begin:end], return_index=True)
+            values = self.old[begin:end][first]
+        grid.values.reshape(-1)[cells] = values
+        if grid.changes is not None:
+            if len(cells) > MAX_CHANGES:
+                grid.changed_all = True
+            else:
+                xs, ys = np.divmod(cells, self.rows)
+                grid.changes.update(zip(xs.tolist(), ys.tolist()))
+
+    def rewind(self, grid: DataGrid) -> None:
+        """Restore the values of grid from when the recording started"""
+        grid.values[...] = self.base
+        grid.changed_all = True
+
+    def first_difference(self, other: 'Trace') -> Optional[int]:
+        """Return the first step in which the changes of other differ from these, None if the traces are equal
+
+        Traces recorded on different grids differ in step 0.
+        """
+        if self.base.shape != other.base.shape or not (self.base == other.base).all():
+            return 0
+        length = min(len(self), len(other))
+        changes = min(self.steps[length], other.steps[length])
+        differs = ((self.index[:changes] != other.index[:changes]) | (self.new[:changes] != other.new[:changes]))
+        # Steps that start at different changes differ in their number of changes
+        first = np.flatnonzero(self.steps[:length + 1] != other.steps[:length + 1])
+        step = first[0] - 1 if first.size else length
+        if differs.any():
+            step = min(step, int(np.searchsorted(self.steps, np.argmax(differs), "right")) - 1)
+        if step == length and len(self) == len(other):
+            return None
+        return int(step)
+
+    def save(self, path: str) -> None:
+        """Write the trace to a compressed .npz file"""
+        np.savez_compressed(path, name=self.name, shape=(self.cols, self.rows), base=self.base, index=self.index,
+                            old=self.old, new=self.new, steps=self.steps)
+
+    @classmethod
+    def load(cls, path: str) -> 'Trace':
+        """Read a trace written by save"""
+        with np.load(path) as data:
+            cols, rows = data["shape"].tolist()
+            return cls(str(data["name"]), cols, rows, data["base"], data["index"], data["old"], data["new"],
+                       data["steps"])
+
+
+class TraceRecorder:
+    """Collects the changes of the values of a grid while it is attached to it as grid.trace"""
+    grid: DataGrid
+    base: np.ndarray
+    index: array
+    old: bytearray
+    new: bytearray
+    # Number of changes at the end of every step
+    steps: array
+
+    def __init__(self, grid: DataGrid):
+        self.grid = grid
+        self.base = grid.values.copy()
+        self.index = array("q")
+        self.old = bytearray()
+        self.new = bytearray()
+        self.steps = array("q", [0])
+
+    def record(self, pos: (int, int), old: int, new: int) -> None:
+        """Add the change of the cell at pos to the current step"""
+        if old != new:
+            self.index.append(pos[0] * self.grid.rows + pos[1])
+            self.old.append(old)
+            self.new.append(new)
+
+    def end_step(self) -> None:
+        """Close the current step, unless nothing changed in it"""
+        if len(self.index) != self.steps[-1]:
+            self.steps.append(len(self.index))
+
+    def finish(self, name: str) -> Trace:
+        """Close the last step and return the trace"""
+        self.end_step()
+        size = self.grid.cols * self.grid.rows
+        index = np.frombuffer(self.index, dtype=np.int64).astype(np.uint32 if size <= 2 ** 32 else np.int64)
+        return Trace(name, self.grid.cols, self.grid.rows, self.base, index,
+                     np.frombuffer(self.old, dtype=np.uint8).copy(), np.frombuffer(self.new, dtype=np.uint8).copy(),
+                     np.frombuffer(self.steps, dtype=np.int64).copy())
+
+
+def trace_search(grid: DataGrid, algo: Algorithm) -> Trace:
+    """Run algo until it is done at full speed and return the trace of the cells it changed"""
+    recorder = grid.trace = TraceRecorder(grid)
+    try:
+        while not algo.is_done():
+            algo.step(grid)
+            recorder.end_step()
+    finally:
+        grid.trace = None
+    return recorder.finish(algo.name)
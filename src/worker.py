@@ -0,0 +1,85 @@
+"""Running a search on a background thread while the frontend draws snapshots of its progress
+
+The algorithm works on the grid as usual. Every interval seconds the worker copies the cell values into a snapshot
+buffer under a lock, which the frontend copies out of at its own frame rate. Between the snapshots the grid belongs
+to the worker, the frontend must not read or change it until the worker is done.
+"""
+from threading import Event, Lock, Thread
+from time import perf_counter
+from typing import Optional, Tuple
+import numpy as np
+from src.data import DataGrid
+from src.algorithms.algorithm import Algorithm
+
+
+class SearchWorker:
+    """Runs an algorithm until it is done or cancelled on a background thread"""
+    grid: DataGrid
+    algo: Algorithm
+    # Seconds between two snapshots
+    interval: float
+    # Copy of the grid values as of the latest snapshot
+    snapshot: np.ndarray
+    # Number of snapshots published so far
+    published: int
+    # Cells expanded by the algorithm as of the latest snapshot
+    expanded: int
+    # Exception raised by the algorithm, raised again by join
+    error: Optional[BaseException]
+
+    def __init__(self, grid: DataGrid, algo: Algorithm, interval: float = 1 / 60):
+        self.grid = grid
+        self.algo = algo
+        self.interval = interval
+        self.lock = Lock()
+        self.cancelled = Event()
+        self.snapshot = grid.values.copy()
+        self.published = 0
+        self.expanded = algo.expanded
+        self.error = None
+        self.thread = Thread(target=self.run, name=f"{algo.name} search", daemon=True)
+
+    def start(self) -> None:
+        """Start the search"""
+        self.thread.start()
+
+    def run(self) -> None:
+        """Run the algorithm and publish a snapshot every interval seconds and when it stops"""
+        algo = self.algo
+        deadline = perf_counter() + self.interval
+        try:
+            while not algo.is_done() and not self.cancelled.is_set():
+                algo.step(self.grid)
+                if perf_counter() >= deadline:
+                    self.publish()
+                    deadline = perf_counter() + self.interval
+        except BaseException as error:
+            self.error = error
+        finally:
+            self.publish()
+
+    def publish(self) -> None:
+        """Copy the current values of the grid into the snapshot"""
+        with self.lock:
+            np.copyto(self.snapshot, self.grid.values)
+            self.expanded = self.algo.expanded
+            self.published += 1
+
+    def latest(self) -> Tuple[int, np.ndarray]:
+        """Return the number of the latest snapshot and a copy of it"""
+        with self.lock:
+            return self.published, self.snapshot.copy()
+
+    def cancel(self) -> None:
+        """Stop the search after the current step"""
+        self.cancelled.set()
+
+    def is_running(self) -> bool:
+        """Return True until the search is done or cancelled"""
+        return self.thread.is_alive()
+
+    def join(self) -> None:
+        """Wait for the worker to stop, raising the exception of the algorithm if it failed"""
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
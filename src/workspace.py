@@ -0,0 +1,58 @@
+"""Per-cell scratch state of searches that is reset in constant time
+
+Instead of filling a score for every cell of the grid before the first expansion, searches keep their scores in a
+workspace of the grid that is reused from search to search. Every score is stamped with the generation of the
+search that wrote it, scores with another stamp count as unset. Claiming the workspace for a new search only
+increments the generation, so a short search on a huge grid only pays for the cells it touches.
+
+The arrays are flat, the cell (x, y) is at index x * rows + y.
+"""
+from array import array
+from typing import Optional, TYPE_CHECKING
+from weakref import ref
+
+if TYPE_CHECKING:
+    from src.algorithms.algorithm import Algorithm
+
+# Generations are stored as unsigned 32 bit integers, the stamps are cleared when they run out
+MAX_GENERATION = 2 ** 32 - 1
+
+
+class Workspace:
+    """Stamped score array of the size of a grid, used by one search at a time"""
+    cols: int
+    rows: int
+    # Generation of the current search, entries stamped with it are set
+    generation: int
+    stamps: array
+    scores: array
+    # Weak reference to the search that claimed the workspace last
+    owner: Optional[ref]
+
+    def __init__(self, cols: int, rows: int):
+        self.cols = cols
+        self.rows = rows
+        self.generation = 0
+        # Repeating a one element array doesn't build a temporary list of the full size
+        self.stamps = array("I", [0]) * (cols * rows)
+        self.scores = array("d", [0.0]) * (cols * rows)
+        self.owner = None
+
+    @property
+    def size(self) -> int:
+        """Memory of the arrays in bytes"""
+        return self.stamps.itemsize * len(self.stamps) + self.scores.itemsize * len(self.scores)
+
+    def claim(self, owner: 'Algorithm') -> int:
+        """Unset all entries for a new search of owner and return the generation it stamps its entries with"""
+        if self.generation == MAX_GENERATION:
+            self.stamps = array("I", [0]) * len(self.stamps)
+            self.generation = 0
+        self.generation += 1
+        self.owner = ref(owner)
+        return self.generation
+
+    def is_free(self) -> bool:
+        """Return True unless the workspace belongs to a search that is neither done nor discarded"""
+        owner: Optional['Algorithm'] = self.owner() if self.owner is not None else None
+        return owner is None or owner.is_done()